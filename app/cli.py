@@ -0,0 +1,280 @@
+# app/cli.py
+# Headless batch prediction: FASTA in, TSV/JSONL out, no Flet.
+#
+# Run from the POPViz directory:
+#     python app/cli.py proteins.fasta -o predictions.tsv --organism "Homo sapiens (Human)"
+#     cat proteins.fasta | python app/cli.py - --format jsonl --workers 8 > predictions.jsonl
+import argparse
+import contextlib
+import json
+import os
+import re
+import sys
+from functools import partial
+
+from services import prediction_algo
+from services.worker_pool import create_pool, balance_jobs, BINS_PER_WORKER
+from services.structure_labels import paint_predictions
+
+DEFAULT_BATCH_SIZE = 64
+
+# UniProt "OS=Homo sapiens OX=9606" or "[organism=Homo sapiens (Human)]"
+UNIPROT_ORGANISM = re.compile(r"\bOS=(.+?)(?=\s+[A-Z]{2}=|$)")
+TAGGED_ORGANISM = re.compile(r"\[organism=([^\]]+)\]")
+
+def read_fasta(handle):
+    # Yields (record_id, header, sequence) one record at a time
+    header = None
+    lines = []
+    for line in handle:
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith(">"):
+            if header is not None:
+                yield header.split()[0] if header else "", header, "".join(lines)
+            header = line[1:].strip()
+            lines = []
+        else:
+            lines.append(line.upper().rstrip("*"))
+    if header is not None:
+        yield header.split()[0] if header else "", header, "".join(lines)
+
+def resolve_organism(header, default_organism):
+    # Organism named in the header if it matches an encoder entry, otherwise the default
+    names = []
+    match = TAGGED_ORGANISM.search(header)
+    if match:
+        names.append(match.group(1).strip())
+    match = UNIPROT_ORGANISM.search(header)
+    if match:
+        names.append(match.group(1).strip())
+
+    for name in names:
+        if name in prediction_algo.organism_encoder:
+            return name
+        # UniProt OS= omits the common name in parentheses, e.g. "Homo sapiens (Human)"
+        for known in prediction_algo.organism_encoder:
+            if known.startswith(name + " ("):
+                return known
+    return default_organism
+
+def iter_records(paths, default_organism):
+    # Yields (index, record_id, organism_name, sequence), index counting from 1
+    index = 0
+    for path in paths:
+        handle = sys.stdin if path == "-" else open(path, "r")
+        try:
+            for record_id, header, sequence in read_fasta(handle):
+                index += 1
+                yield index, record_id, resolve_organism(header, default_organism), sequence
+        finally:
+            if handle is not sys.stdin:
+                handle.close()
+
+def iter_batches(records, batch_size):
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def predict_batch(batch, render_options=None):
+    # Returns one result dict per record; runs in a worker process when --workers > 1
+    results = [None] * len(batch)
+    valid = []
+    for i, (_, record_id, organism_name, _) in enumerate(batch):
+        if organism_name in prediction_algo.organism_encoder:
+            valid.append(i)
+        else:
+            results[i] = {"id": record_id, "organism": organism_name,
+                          "error": f"Organism '{organism_name}' not found in encoder."}
+
+    # prediction_algo logs to stdout, which may be the output stream
+    with contextlib.redirect_stdout(sys.stderr):
+        predictions = dict(zip(valid, prediction_algo.on_predict_batch(
+            [(batch[i][2], batch[i][3]) for i in valid]
+        )))
+
+    for i, preds in predictions.items():
+        index, record_id, organism_name, sequence = batch[i]
+        predicted_sequence, labels = paint_predictions(preds, len(sequence))
+        segments = sorted(({
+            "start": int(pred["start"]),
+            "end": int(pred["end"]),
+            "label": str(pred["label"]),
+            "confidence": round(float(pred["confidence"]), 6)
+        } for pred in preds), key=lambda seg: seg["start"])
+        results[i] = {
+            "id": record_id,
+            "organism": organism_name,
+            "length": len(sequence),
+            "predicted_structure": predicted_sequence,
+            "segments": segments,
+        }
+        if render_options:
+            render_outputs(results[i], labels, index, **render_options)
+    return results
+
+def run_balanced(pool, run_batch, window, num_bins):
+    # run_batch over bins of records with similar total window counts, so a few
+    # long records don't hold up one worker; results come back in record order
+    bins = balance_jobs([(organism_name, sequence) for _, _, organism_name, sequence in window],
+                        min(len(window), num_bins))
+    results = [None] * len(window)
+    record_bins = [[window[i] for i, _, _ in job_bin] for job_bin in bins]
+    for job_bin, bin_results in zip(bins, pool.imap(run_batch, record_bins)):
+        for (i, _, _), result in zip(job_bin, bin_results):
+            results[i] = result
+    return results
+
+def sweep_batch(batch, organisms=None):
+    # --sweep: every record predicted for every organism (or the --sweep-organism list)
+    results = []
+    for _, record_id, _, sequence in batch:
+        with contextlib.redirect_stdout(sys.stderr):
+            sweep = prediction_algo.on_predict_sweep(sequence, organisms)
+        results.append({
+            "id": record_id,
+            "length": len(sequence.strip()),
+            "consensus": sweep["consensus"],
+            "changed_positions": sweep["changed_positions"],
+            "profiles": sweep["profiles"],
+        })
+    return results
+
+def render_outputs(result, labels, index, assets_dir, charts, pdf, tiles=False):
+    # Charts and PDF for one record, under <assets_dir>/<index>_<id>/
+    from services.graph_service import generate_structure_dot_plot, generate_pie_chart, generate_bar_chart, DATABASE_HEC_AVG
+    from services.result_utils import generate_insights, generate_pdf
+
+    predicted_sequence = result["predicted_structure"]
+    if not predicted_sequence:
+        return
+    folder_name = f"{index:06d}_" + re.sub(r"[^A-Za-z0-9_.-]", "_", result["id"])[:80]
+
+    with contextlib.redirect_stdout(sys.stderr):
+        # Rendered charts, handed to the PDF from memory
+        rendered = {}
+        if charts:
+            rendered["structure.png"] = generate_structure_dot_plot(predicted_sequence, folder_name, assets_folder=assets_dir,
+                                                                   labels=labels, tiles=tiles)
+            rendered["pie_chart.png"] = generate_pie_chart(predicted_sequence, folder_name, assets_folder=assets_dir, labels=labels)
+            rendered["bar_chart.png"] = generate_bar_chart(predicted_sequence, DATABASE_HEC_AVG, folder_name, assets_folder=assets_dir, labels=labels)
+        if pdf:
+            os.makedirs(os.path.join(assets_dir, folder_name), exist_ok=True)
+            generate_pdf(
+                predicted_sequence,
+                generate_insights(predicted_sequence, labels),
+                folder_name,
+                output_path=os.path.join(assets_dir, folder_name, "prediction.pdf"),
+                charts=rendered,
+            )
+
+def write_result(result, out, segments_out, output_format):
+    if output_format == "jsonl":
+        out.write(json.dumps(result) + "\n")
+        return
+
+    if "profiles" in result:
+        # Sweep: one row per organism
+        for organism_name, profile in result["profiles"].items():
+            out.write("\t".join([result["id"], organism_name, str(result["length"]), profile]) + "\n")
+        return
+
+    out.write("\t".join([result["id"], result["organism"] or "", str(result["length"]),
+                         result["predicted_structure"]]) + "\n")
+    if segments_out:
+        for seg in result["segments"]:
+            segments_out.write(f"{result['id']}\t{seg['start']}\t{seg['end']}\t{seg['label']}\t{seg['confidence']}\n")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Predict secondary structure for FASTA records without the GUI.")
+    parser.add_argument("inputs", nargs="*", default=["-"], help="FASTA / multi-FASTA files, '-' for stdin (default)")
+    parser.add_argument("-o", "--output", default="-", help="Output file, '-' for stdout (default)")
+    parser.add_argument("--format", choices=["tsv", "jsonl"], default="tsv", help="Output format (default: tsv)")
+    parser.add_argument("--segments", help="TSV file for the segment table (tsv format only; jsonl embeds segments)")
+    parser.add_argument("--organism", help="Organism for records whose header names none (OS= or [organism=...])")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Records per batched model call")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes (default: 1, in-process)")
+    parser.add_argument("--no-charts", action="store_true", help="Skip the structure, pie and bar charts")
+    parser.add_argument("--no-pdf", action="store_true", help="Skip the per-record PDF report")
+    parser.add_argument("--tiles", action="store_true",
+                        help="Also write the structure plot at full detail, split into structure_tile_<n>.png files")
+    parser.add_argument("--sweep", action="store_true",
+                        help="Predict every record for every organism (or each --sweep-organism); no charts or PDF")
+    parser.add_argument("--sweep-organism", action="append", dest="sweep_organisms", metavar="ORGANISM",
+                        help="Organism to include in --sweep (repeatable, default: all)")
+    parser.add_argument("--assets-dir", default="popviz_output", help="Where charts and PDFs are written")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    render_options = None
+    if not (args.no_charts and args.no_pdf):
+        render_options = {"assets_dir": args.assets_dir, "charts": not args.no_charts, "pdf": not args.no_pdf,
+                          "tiles": args.tiles}
+    if args.sweep:
+        run_batch = partial(sweep_batch, organisms=args.sweep_organisms)
+    else:
+        run_batch = partial(predict_batch, render_options=render_options)
+
+    # Load the model up front so the registry's log line goes to stderr, not the output
+    with contextlib.redirect_stdout(sys.stderr):
+        prediction_algo.artifacts()
+    unknown = [name for name in args.sweep_organisms or [] if name not in prediction_algo.organism_encoder]
+    if unknown:
+        print(f"Organisms not found in encoder: {', '.join(unknown)}", file=sys.stderr)
+        return 2
+
+    records = iter_records(args.inputs, args.organism)
+
+    out = sys.stdout if args.output == "-" else open(args.output, "w")
+    segments_out = open(args.segments, "w") if args.segments and args.format == "tsv" else None
+    if args.format == "tsv":
+        out.write("id\torganism\tlength\tpredicted_structure\n")
+        if segments_out:
+            segments_out.write("id\tstart\tend\tlabel\tconfidence\n")
+
+    pool = create_pool(args.workers) if args.workers > 1 else None
+    if pool:
+        # Records are read a window at a time and balanced over BINS_PER_WORKER bins per worker,
+        # each about --batch-size records
+        num_bins = args.workers * BINS_PER_WORKER
+        results = (run_balanced(pool, run_batch, window, num_bins)
+                   for window in iter_batches(records, args.batch_size * num_bins))
+    else:
+        results = map(run_batch, iter_batches(records, args.batch_size))
+
+    done = 0
+    failed = 0
+    try:
+        for batch_results in results:
+            for result in batch_results:
+                done += 1
+                if "error" in result:
+                    failed += 1
+                    print(f"Skipping {result['id']}: {result['error']}", file=sys.stderr)
+                    continue
+                write_result(result, out, segments_out, args.format)
+                if args.sweep:
+                    print(f"{result['id']}: {len(result['changed_positions'])} of {result['length']} residues "
+                          f"change across {len(result['profiles'])} organisms", file=sys.stderr)
+            out.flush()
+            print(f"Predicted {done} records ({failed} skipped)", file=sys.stderr)
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
+        if out is not sys.stdout:
+            out.close()
+        if segments_out:
+            segments_out.close()
+
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
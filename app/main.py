@@ -1,10 +1,8 @@
 import flet as ft
-from pages.landing_page import LandingPage
-from pages.input_page import InputPage
-from pages.result_page import ResultPage
-from pages.history_page import HistoryPage
+import importlib
 import os
 import sys
+import threading
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -17,6 +15,25 @@ load_dotenv()
 
 # check_working_directory()
 
+# Route -> (module, class). Page modules are imported on first navigation, so
+# the landing page does not wait for the prediction, chart and PDF stacks.
+PAGES = {
+    "": ("pages.landing_page", "LandingPage"),
+    "input": ("pages.input_page", "InputPage"),
+    "history": ("pages.history_page", "HistoryPage"),
+    "result": ("pages.result_page", "ResultPage"),
+}
+
+def start_model_registry():
+    # Importing prediction_algo pulls in NumPy and the model code, so do it off the UI thread too
+    from services.prediction_algo import registry as model_registry
+    model_registry.start(watch=True)
+
+def start_chart_pool():
+    # Chart renderer processes import matplotlib while the user is still on the input page
+    from services import chart_pool
+    chart_pool.start()
+
 def main(page: ft.Page):
     page.title = "POPViz - Protein Structure Predictor"
     page.window_width = 900
@@ -24,24 +41,24 @@ def main(page: ft.Page):
     page.theme_mode = ft.ThemeMode.LIGHT
     page.scroll = "adaptive"
 
-    # Create page instances
-    landing_page = LandingPage(page)
-    input_page = InputPage(page)
-    result_page = ResultPage(page)
-    history_page = HistoryPage(page)
+    # Page instances, created the first time their route is visited
+    page_instances = {}
+
+    def get_page(name):
+        if name not in page_instances:
+            module_name, class_name = PAGES[name]
+            page_class = getattr(importlib.import_module(module_name), class_name)
+            page_instances[name] = page_class(page)
+        return page_instances[name]
 
     def route_change(route):
         page.views.clear()
         route_name = page.route.strip("/")
+        if route_name.startswith("result"):
+            route_name = "result"
 
-        if route_name == "":
-            page.views.append(landing_page.build())
-        elif route_name == "input":
-            page.views.append(input_page.build())
-        elif route_name == "history":
-            page.views.append(history_page.build())
-        elif route_name.startswith("result"):
-            page.views.append(result_page.build())
+        if route_name in PAGES:
+            page.views.append(get_page(route_name).build())
         else:
             page.views.append(ft.View("/", [ft.Text("404 Not Found")]))
 
@@ -50,7 +67,12 @@ def main(page: ft.Page):
     page.on_route_change = route_change
     page.go(page.route)
 
-if os.getenv("RUNNING_IN_DOCKER") == "1":
-    ft.app(target=main, view=ft.WEB_BROWSER)
-else:
-    ft.app(target=main)
\ No newline at end of file
+if __name__ == "__main__":
+    # Load the model in the background while the first window comes up, and reload it when ML/predictor changes
+    threading.Thread(target=start_model_registry, name="model-registry-start", daemon=True).start()
+    threading.Thread(target=start_chart_pool, name="chart-pool-start", daemon=True).start()
+
+    if os.getenv("RUNNING_IN_DOCKER") == "1":
+        ft.app(target=main, view=ft.WEB_BROWSER)
+    else:
+        ft.app(target=main)
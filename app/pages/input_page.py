@@ -2,15 +2,33 @@ from datetime import datetime
 import os
 import flet as ft
 from components.navbar import Navbar
-from services.prediction_algo import on_predict as predict_structure
-from services.graph_service import generate_structure_dot_plot, generate_pie_chart, generate_bar_chart
+from services.prediction_algo import registry as model_registry
+from services.incremental import on_predict_incremental
+from services.model_registry import READY, FAILED
+from services.prediction_jobs import PredictionJob, PredictionCancelled
+from services.prediction_cache import prediction_cache
+from services.structure_labels import paint_predictions
 import uuid
 import json
-from PyPDF2 import PdfReader
 
 class InputPage:
     def __init__(self, page: ft.Page):
         self.page = page
+        self.model_state_listener = None
+        # Per-window results of the last prediction, for incremental re-prediction after edits
+        self.prediction_state = None
+        # The model registry is shared by every session: stop listening while this one
+        # is disconnected, so closed sessions do not pile up in registry.listeners
+        self.page.on_disconnect = self.on_session_disconnect
+        self.page.on_connect = self.on_session_connect
+
+    def on_session_disconnect(self, e):
+        if self.model_state_listener:
+            model_registry.remove_listener(self.model_state_listener)
+
+    def on_session_connect(self, e):
+        if self.model_state_listener and self.model_state_listener not in model_registry.listeners:
+            model_registry.add_listener(self.model_state_listener)
 
     def build(self):
         # File picker setup
@@ -25,6 +43,7 @@ class InputPage:
                         with open(file_path, "r", encoding="utf-8") as f:
                             content = f.read()
                     elif file_path.endswith(".pdf"):
+                        from PyPDF2 import PdfReader
                         reader = PdfReader(file_path)
                         content = ""
                         for page in reader.pages:
@@ -115,6 +134,26 @@ class InputPage:
             )
         )
 
+        model_status = ft.Text("", size=12, color=ft.Colors.GREY_600)
+
+        # Progress of the running prediction job
+        progress_stage = ft.Text(
+            "Predicting protein structure...",
+            size=16,
+            color="#104911",
+            weight=ft.FontWeight.W_500
+        )
+        progress_bar = ft.ProgressBar(
+            value=0,
+            width=260,
+            color="#104911",
+            bgcolor="#E0EDE0"
+        )
+        cancel_button = ft.TextButton(
+            "Cancel",
+            style=ft.ButtonStyle(color="#D32F2F")
+        )
+
         # Loading overlay component
         loading_overlay = ft.Container(
             visible=False,  # Hidden by default
@@ -138,17 +177,16 @@ class InputPage:
                                     height=60
                                 ),
                                 ft.Container(height=20),
-                                ft.Text(
-                                    "Predicting protein structure...",
-                                    size=16,
-                                    color="#104911",
-                                    weight=ft.FontWeight.W_500
-                                ),
+                                progress_stage,
+                                ft.Container(height=10),
+                                progress_bar,
                                 ft.Text(
                                     "Please wait, this may take a few moments",
                                     size=12,
                                     color=ft.Colors.GREY_600
-                                )
+                                ),
+                                ft.Container(height=10),
+                                cancel_button
                             ]
                         )
                     )
@@ -189,48 +227,70 @@ class InputPage:
             with open(history_path, "w") as f:
                 json.dump(history, f, indent=4)
 
-        def on_predict(e):
-            prediction_uuid = str(uuid.uuid4())
-            
-            # Show loading overlay
-            loading_overlay.visible = True
+        # Job currently running for this page, if any
+        current_job = {"job": None}
+
+        def show_progress(stage, fraction):
+            progress_stage.value = stage
+            progress_bar.value = fraction
+            self.page.update()
+
+        def hide_overlay():
+            loading_overlay.visible = False
+            predict_button.disabled = model_registry.state != READY
             self.page.update()
 
+        def apply_model_state(state):
+            if state == READY:
+                model_status.value = ""
+            elif state == FAILED:
+                model_status.value = f"Prediction model failed to load: {model_registry.error}"
+                model_status.color = ft.Colors.RED_400
+            else:
+                model_status.value = "Loading prediction model..."
+                model_status.color = ft.Colors.GREY_600
+            predict_button.disabled = state != READY or current_job["job"] is not None
+
+        def on_model_state(state):
+            # Called from the model loader thread
+            apply_model_state(state)
+            self.page.update()
+
+        # Only the latest build of this page listens for model state changes
+        if self.model_state_listener:
+            model_registry.remove_listener(self.model_state_listener)
+        self.model_state_listener = on_model_state
+        model_registry.add_listener(on_model_state)
+        model_registry.start()
+        apply_model_state(model_registry.state)
+
+        def run_prediction(job, prediction_uuid, organism_name, full_sequence):
+            # Runs on a background worker; job.report() raises PredictionCancelled once cancelled
             try:
-                organism_name = organism_input.value
-                full_sequence = input_field.value
-                
-                results = predict_structure(organism_name, full_sequence)
-
-                # Initialize prediction with 'C' (Coil) by default
-                predicted_sequence_list = ['C'] * len(full_sequence)
-
-                label_to_hec = {
-                    'helix': 'H',
-                    'strand': 'E',
-                    'turn': 'C'
-                }
-
-                # Fill in based on start-end positions
-                for pred in results:
-                    label = label_to_hec.get(pred['label'].lower(), 'C')
-                    start = pred['start']
-                    end = pred['end']
-                    for i in range(start, end):
-                        if 0 <= i < len(full_sequence):
-                            predicted_sequence_list[i] = label
-
-                predicted_sequence = ''.join(predicted_sequence_list)
+                # Same organism + sequence + model files ➔ reuse the stored result
+                cached = prediction_cache.get(organism_name, full_sequence)
+                if cached:
+                    results = cached["predictions"]
+                else:
+                    # Reuses the previous run's windows when only part of the sequence was edited.
+                    # Reports encoding, inference and suppression (0 to 0.8); each report is a cancel point.
+                    results, self.prediction_state = on_predict_incremental(
+                        organism_name,
+                        full_sequence,
+                        self.prediction_state,
+                        on_stage=job.report
+                    )
+
+                # Per-residue H/E/C string; charts are rendered when the result page first shows them
+                predicted_sequence, _ = paint_predictions(results, len(full_sequence))
                 
                 print(f"input page predicted sequence: {predicted_sequence}")
                 
-                # Generate the graphs
-                generate_structure_dot_plot(predicted_sequence, prediction_uuid)
-                generate_pie_chart(predicted_sequence, prediction_uuid)
-                # Example known averages
-                known_avg = [0.4, 0.3, 0.3]  # H, E, C proportions in known database
-                generate_bar_chart(predicted_sequence, known_avg, prediction_uuid)
-                
+                # Last chance to cancel; nothing has been saved yet
+                job.report("Saving result...", 0.9)
+                if not cached:
+                    prediction_cache.put(organism_name, full_sequence, results)
+
                 # Save the sequence in the page session or state
                 self.page.client_storage.set("predicted_sequence", predicted_sequence)
                 self.page.client_storage.set("prediction_uuid", prediction_uuid)
@@ -239,17 +299,46 @@ class InputPage:
                 
                 print(f"Input Page Client Storage: {self.page.client_storage.get("predicted_sequence")}")
 
-                # Hide loading overlay
-                loading_overlay.visible = False
-                self.page.update()
+                show_progress("Done", 1.0)
+                hide_overlay()
                 
                 self.page.go("/result")
+            except PredictionCancelled:
+                hide_overlay()
+                print(f"Prediction cancelled: {prediction_uuid}")
             except Exception as ex:
                 # Hide loading overlay on error
-                loading_overlay.visible = False
-                self.page.update()
+                hide_overlay()
                 print(f"Prediction failed: {ex}")
+            finally:
+                if current_job["job"] is job:
+                    current_job["job"] = None
+
+        def on_predict(e):
+            if current_job["job"] is not None:
+                return
+
+            prediction_uuid = str(uuid.uuid4())
+            
+            # Show loading overlay
+            loading_overlay.visible = True
+            predict_button.disabled = True
+            cancel_button.disabled = False
+            show_progress("Starting prediction...", 0)
+
+            job = PredictionJob(on_progress=show_progress)
+            current_job["job"] = job
+            job.submit(run_prediction, job, prediction_uuid, organism_input.value, input_field.value)
+
+        def on_cancel(e):
+            job = current_job["job"]
+            if job is not None:
+                job.cancel()
+                cancel_button.disabled = True
+                progress_stage.value = "Cancelling..."
+                self.page.update()
 
+        cancel_button.on_click = on_cancel
         predict_button.on_click = on_predict
 
         # Main content
@@ -366,6 +455,7 @@ class InputPage:
                         content=predict_button,
                         alignment=ft.alignment.center
                     ),
+                    model_status,
                 ]
             )
         )
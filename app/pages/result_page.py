@@ -1,7 +1,10 @@
 from urllib.parse import parse_qs, urlparse
+import base64
 import flet as ft
 from components.navbar import Navbar
 from services.result_utils import color_sequence, generate_insights, generate_pdf
+from services.structure_labels import string_to_labels
+from services.chart_cache import chart_cache
 import os
 import json
 
@@ -14,11 +17,13 @@ class ResultPage:
     def save_file_result(self, e: ft.FilePickerResultEvent):
         if e.path:
             sequence = self.sequence
-            insights = generate_insights(sequence)
+            insights = generate_insights(sequence, self.labels)
             prediction_uuid = self.prediction_uuid
+            # Renders any chart the page has not needed yet
+            charts = chart_cache.charts(sequence)
 
             # Generate the PDF directly to the chosen path
-            generate_pdf(sequence, insights, prediction_uuid, output_path=e.path)
+            generate_pdf(sequence, insights, prediction_uuid, output_path=e.path, charts=charts)
 
             print(f"PDF saved to: {e.path}")
     
@@ -47,10 +52,11 @@ class ResultPage:
         
     def download_pdf(self, e):
         sequence = self.sequence
-        insights = generate_insights(sequence)
+        insights = generate_insights(sequence, self.labels)
         prediction_uuid = self.prediction_uuid
+        charts = chart_cache.charts(sequence)
         
-        pdf_path = generate_pdf(sequence, insights, prediction_uuid)
+        pdf_path = generate_pdf(sequence, insights, prediction_uuid, charts=charts)
         self.page.launch_url(f"/{pdf_path}")
         
     def build(self):
@@ -81,8 +87,9 @@ class ResultPage:
             self.sequence = self.page.client_storage.get("predicted_sequence")
             self.prediction_uuid = self.page.client_storage.get("prediction_uuid")
 
-        
-        insights_list = generate_insights(self.sequence)
+        # Label codes for the insights, decoded once per visit
+        self.labels = string_to_labels(self.sequence)
+        insights_list = generate_insights(self.sequence, self.labels)
         insights_column = ft.Column(
             controls=[ft.Text(text, color="#444444", size=14, text_align=ft.TextAlign.JUSTIFY) for text in insights_list]
         )
@@ -172,12 +179,7 @@ class ResultPage:
                                 text_align=ft.TextAlign.CENTER
                             ),
                             ft.Container(height=20),
-                            ft.Image(
-                                src=f"app/assets/{self.prediction_uuid}/structure.png",  # Ganti sesuai nama file kamu
-                                width=400,
-                                height=300,
-                                fit=ft.ImageFit.CONTAIN
-                            )
+                            self.create_chart_image("structure.png", 400, 300)
                         ], horizontal_alignment=ft.CrossAxisAlignment.CENTER),
                         bgcolor=ft.Colors.WHITE,
                         padding=25,
@@ -407,17 +409,37 @@ class ResultPage:
         )
         
     def create_pie_chart_placeholder(self):
-        return ft.Image(
-            src=f"app/assets/{self.prediction_uuid}/pie_chart.png",
-            width=350,
-            height=350,
-            fit=ft.ImageFit.CONTAIN
-        )
+        return self.create_chart_image("pie_chart.png", 350, 350)
 
     def create_bar_chart_placeholder(self):
-        return ft.Image(
-            src=f"app/assets/{self.prediction_uuid}/bar_chart.png",
-            width=450,
-            height=300,
-            fit=ft.ImageFit.CONTAIN
-        )
\ No newline at end of file
+        return self.create_chart_image("bar_chart.png", 450, 300)
+
+    def create_chart_image(self, name, width, height):
+        def chart_image(png):
+            # Sent inline, no file for the client to fetch
+            return ft.Image(
+                src_base64=base64.b64encode(png).decode("ascii"),
+                width=width,
+                height=height,
+                fit=ft.ImageFit.CONTAIN
+            )
+
+        # Rendered on first request; already done when this structure was shown before
+        chart = chart_cache.chart(name, self.sequence)
+        if chart.done() and chart.exception() is None:
+            return chart_image(chart.result())
+
+        # Still rendering: show a spinner and swap the chart in when it is written
+        slot = ft.Container(content=ft.ProgressRing(), width=width, height=height, alignment=ft.alignment.center)
+
+        def chart_done(future):
+            # Called from the chart pool's result thread
+            if future.exception() is None:
+                slot.content = chart_image(future.result())
+            else:
+                print(f"Chart failed: {name}: {future.exception()}")
+                slot.content = ft.Text("Chart unavailable", color="#444444", size=14)
+            self.page.update()
+
+        chart.add_done_callback(chart_done)
+        return slot
@@ -0,0 +1,178 @@
+# app/services/artifact_bundle.py
+# Everything prediction needs from ML/predictor compiled into one binary file:
+# the encoders as sorted arrays, the scaled window lengths, the label classes,
+# the NumPy model weights and (when built) the probability table. Arrays are
+# stored uncompressed and aligned, so loading is one np.memmap and every array
+# is a read-only view into it; processes that open the same bundle share its
+# pages through the OS page cache.
+#
+# Layout: MAGIC | header length (uint64 LE) | JSON header | padding | array data
+#
+# Build (run from the POPViz directory after changing anything in ML/predictor,
+# and after re-exporting the NumPy model / probability table):
+#     python app/services/artifact_bundle.py
+import numpy as np
+import hashlib
+import json
+import os
+import sys
+
+if __name__ == "__main__":
+    # Run as a build script: make the services package importable
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from services.numpy_model import files_sha256
+
+bundle_path = "ML/predictor/artifacts.bundle"
+
+MAGIC = b"POPVIZAB"
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+
+# Artifacts the bundle is compiled from
+source_paths = [
+    "ML/predictor/Organism_encodemap.json",
+    "ML/predictor/subsequence_encodemap.json",
+    "ML/predictor/scaler.pkl",
+    "ML/predictor/label_encoder.pkl",
+    "ML/predictor/nn_model.pkl",
+]
+
+def sources_sha256(paths=source_paths):
+    return files_sha256(paths)
+
+def aligned(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+class ArtifactBundle:
+    def __init__(self, meta, arrays, header):
+        # meta: small JSON-able values, arrays: name -> read-only view into the mapped file
+        self.meta = meta
+        self.arrays = arrays
+        self.header = header
+
+def write_bundle(meta, arrays, output_path=bundle_path):
+    arrays = {name: np.ascontiguousarray(array) for name, array in arrays.items()}
+    entries = {}
+    offset = 0
+    for name, array in arrays.items():
+        offset = aligned(offset)
+        entries[name] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": offset, "nbytes": array.nbytes}
+        offset += array.nbytes
+    data_size = offset
+
+    # Checksum of the data section, computed before the header so it can go in it
+    data_digest = hashlib.sha256()
+    padding = b""
+    for name, array in arrays.items():
+        data_digest.update(padding)
+        data_digest.update(array.tobytes())
+        end = entries[name]["offset"] + array.nbytes
+        padding = b"\0" * (aligned(end) - end)
+
+    header = {
+        "format_version": FORMAT_VERSION,
+        "source_sha256": sources_sha256(),
+        "data_sha256": data_digest.hexdigest(),
+        "data_size": data_size,
+        "arrays": entries,
+        "meta": meta,
+    }
+    header_bytes = json.dumps(header).encode("utf-8")
+    data_offset = aligned(len(MAGIC) + 8 + len(header_bytes))
+
+    # Written next to the target and renamed into place: processes that still map
+    # the old bundle keep their (unlinked) file instead of seeing it truncated
+    temp_path = output_path + ".tmp"
+    with open(temp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(len(header_bytes).to_bytes(8, "little"))
+        f.write(header_bytes)
+        f.write(b"\0" * (data_offset - f.tell()))
+        for name, array in arrays.items():
+            f.write(b"\0" * (data_offset + entries[name]["offset"] - f.tell()))
+            f.write(array.tobytes())
+    os.replace(temp_path, output_path)
+    return output_path
+
+def load_bundle(path=bundle_path, verify=True):
+    # Returns None when the bundle is missing, from another format version,
+    # built from different artifacts, or (verify=True) fails its checksum
+    if not os.path.exists(path):
+        return None
+
+    mapped = np.memmap(path, dtype=np.uint8, mode="r")
+    if bytes(mapped[:len(MAGIC)]) != MAGIC:
+        print(f"Ignoring {path}: not an artifact bundle")
+        return None
+    header_length = int.from_bytes(bytes(mapped[len(MAGIC):len(MAGIC) + 8]), "little")
+    header_start = len(MAGIC) + 8
+    header = json.loads(bytes(mapped[header_start:header_start + header_length]))
+
+    if header["format_version"] != FORMAT_VERSION:
+        print(f"Ignoring {path}: format version {header['format_version']}, expected {FORMAT_VERSION}")
+        return None
+    # Deployments may ship only the bundle; staleness is checked when the sources are there
+    if all(os.path.exists(source) for source in source_paths) and header["source_sha256"] != sources_sha256():
+        print(f"Ignoring stale artifact bundle: {path}")
+        return None
+
+    data_offset = aligned(header_start + header_length)
+    if verify:
+        data = mapped[data_offset:data_offset + header["data_size"]]
+        if len(data) != header["data_size"] or hashlib.sha256(data).hexdigest() != header["data_sha256"]:
+            print(f"Ignoring {path}: checksum mismatch")
+            return None
+
+    arrays = {}
+    for name, entry in header["arrays"].items():
+        arrays[name] = np.ndarray(
+            tuple(entry["shape"]), dtype=np.dtype(entry["dtype"]),
+            buffer=mapped, offset=data_offset + entry["offset"]
+        )
+    return ArtifactBundle(header["meta"], arrays, header)
+
+def compile_bundle(artifacts, model, prob_table=None, output_path=bundle_path):
+    # artifacts: as returned by prediction_algo.load_source_artifacts()
+    index = artifacts.subsequence_index
+    arrays = {
+        "organism_values": np.array(list(artifacts.organism_encoder.values()), dtype=float),
+        "subsequence_values": artifacts.subsequence_values,
+        "kmer_keys": index.keys,
+        "kmer_values": index.values,
+        "kmer_digits": index.digits,
+        "scaled_lengths": artifacts.scaled_lengths,
+    }
+    layers = []
+    for i, (spec, weights) in enumerate(model.layers):
+        layers.append(spec)
+        for j, w in enumerate(weights):
+            arrays[f"layer{i}_w{j}"] = w
+    if prob_table is not None:
+        arrays["prob_table"] = prob_table.table
+        for name, axis in zip(("org_values", "subseq_values", "length_values"), prob_table.axes):
+            arrays[f"prob_table_{name}"] = axis
+
+    meta = {
+        "organism_names": list(artifacts.organism_encoder),
+        "label_classes": [str(label) for label in artifacts.label_classes],
+        "kmer": {"base": index.base, "min_len": index.min_len, "max_len": index.max_len},
+        "model": {"layers": layers, "input_shape": list(model.input_shape)},
+        "has_prob_table": prob_table is not None,
+    }
+    return write_bundle(meta, arrays, output_path)
+
+if __name__ == "__main__":
+    from services import prediction_algo
+    from services.numpy_model import load_numpy_model
+    from services.prob_table import load_probability_table
+
+    numpy_model = load_numpy_model()
+    if numpy_model is None:
+        sys.exit("No up-to-date NumPy model export; run python app/services/numpy_model.py first")
+    prob_table = load_probability_table()
+    if prob_table is None:
+        print("No up-to-date probability table; building the bundle without it")
+
+    compile_bundle(prediction_algo.load_source_artifacts(), numpy_model, prob_table)
+    bundle = load_bundle()
+    print(f"Built {bundle_path} ({os.path.getsize(bundle_path)} bytes, {len(bundle.arrays)} arrays)")
@@ -0,0 +1,166 @@
+# app/services/chart_cache.py
+# Content-addressed store of rendered charts. A chart is rendered the first
+# time a page or the PDF export asks for it and kept under a hash of (chart,
+# predicted H/E/C string, reference averages), so a prediction whose result
+# was seen before costs no renders at all. Charts are handed out as PNG bytes
+# from an in-memory LRU of up to MAX_MEMORY_BYTES; unless POPVIZ_PERSIST_CHARTS=0
+# they are also written under CACHE_DIR as <key>.png, where the least recently
+# used are deleted once they exceed MAX_DISK_BYTES.
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from services import chart_pool
+from services.graph_service import CHART_FILES, DATABASE_HEC_AVG
+
+CACHE_DIR = os.path.join("app", "assets", "charts")
+MAX_DISK_BYTES = 100 * 1024 * 1024
+MAX_MEMORY_BYTES = 32 * 1024 * 1024
+PERSIST_CHARTS = os.getenv("POPVIZ_PERSIST_CHARTS", "1") != "0"
+
+# Charts whose image depends on the reference averages
+USES_REFERENCE = {"bar_chart.png"}
+
+class ChartCache:
+    def __init__(self, cache_dir=CACHE_DIR, max_disk_bytes=MAX_DISK_BYTES,
+                 max_memory_bytes=MAX_MEMORY_BYTES, persist=PERSIST_CHARTS):
+        self.cache_dir = cache_dir
+        self.max_disk_bytes = max_disk_bytes
+        self.max_memory_bytes = max_memory_bytes
+        self.persist = persist
+        self.memory = OrderedDict()  # key -> PNG bytes, least recently used first
+        self.memory_bytes = 0
+        self.lock = threading.Lock()
+        self.rendering = {}  # key -> Future of the PNG bytes, while the chart renders
+
+    def key(self, name, predicted_sequence, database_hec_avg=DATABASE_HEC_AVG):
+        reference = [float(x) for x in database_hec_avg] if name in USES_REFERENCE else None
+        payload = json.dumps([name, predicted_sequence, reference])
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.png")
+
+    def chart(self, name, predicted_sequence, database_hec_avg=DATABASE_HEC_AVG):
+        # Future of the chart's PNG bytes; already done when the chart is cached.
+        # Concurrent requests for the same chart share one render.
+        key = self.key(name, predicted_sequence, database_hec_avg)
+        with self.lock:
+            if key in self.rendering:
+                return self.rendering[key]
+            future = Future()
+            png = self.memory.get(key)
+            if png is not None:
+                self.memory.move_to_end(key)
+                future.set_result(png)
+                return future
+            self.rendering[key] = future
+
+        png = self.read_disk(key)
+        if png is not None:
+            self.remember(key, png)
+            with self.lock:
+                self.rendering.pop(key, None)
+            future.set_result(png)
+            return future
+
+        print(f"Rendering chart: {name}")
+        try:
+            rendered = chart_pool.submit_chart(name, predicted_sequence, database_hec_avg)
+        except Exception as ex:
+            # Nothing will complete this future: fail it and let the next request try again
+            with self.lock:
+                self.rendering.pop(key, None)
+            future.set_exception(ex)
+            return future
+
+        def chart_rendered(done):
+            try:
+                png = done.result()
+            except Exception as ex:
+                with self.lock:
+                    self.rendering.pop(key, None)
+                future.set_exception(ex)
+                return
+            self.remember(key, png)
+            with self.lock:
+                self.rendering.pop(key, None)
+            future.set_result(png)
+            # Written after the waiters have their bytes
+            if self.persist:
+                try:
+                    self.write_disk(key, png)
+                except OSError as ex:
+                    print(f"Could not persist chart {key}: {ex}")
+
+        rendered.add_done_callback(chart_rendered)
+        return future
+
+    def charts(self, predicted_sequence, database_hec_avg=DATABASE_HEC_AVG):
+        # {file name: PNG bytes} for every chart; the missing ones render in parallel
+        futures = {name: self.chart(name, predicted_sequence, database_hec_avg) for name in CHART_FILES}
+        return {name: future.result() for name, future in futures.items()}
+
+    def remember(self, key, png):
+        with self.lock:
+            if key in self.memory:
+                self.memory_bytes -= len(self.memory.pop(key))
+            self.memory[key] = png
+            self.memory_bytes += len(png)
+            while self.memory_bytes > self.max_memory_bytes and len(self.memory) > 1:
+                _, dropped = self.memory.popitem(last=False)
+                self.memory_bytes -= len(dropped)
+
+    def read_disk(self, key):
+        if not self.persist:
+            return None
+        path = self.path(key)
+        try:
+            with open(path, "rb") as f:
+                png = f.read()
+            # Touch the file so disk eviction is least-recently-used
+            os.utime(path)
+        except OSError:
+            return None
+        return png
+
+    def write_disk(self, key, png):
+        # Written next to the target and renamed, so readers never see a partial file
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self.path(key)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(png)
+        os.replace(temp_path, path)
+        self.evict(keep=path)
+
+    def evict(self, keep=None):
+        # Deletes least-recently-used chart files until they fit in max_disk_bytes
+        entries = []
+        total = 0
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".png"):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, path, stat.st_size))
+            total += stat.st_size
+
+        for _, path, size in sorted(entries):
+            if total <= self.max_disk_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+
+chart_cache = ChartCache()
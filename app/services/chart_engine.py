@@ -0,0 +1,81 @@
+# app/services/chart_engine.py
+# Pie and bar charts drawn on explicit Figure/FigureCanvasAgg objects instead
+# of the pyplot state machine. Each thread builds its own figures once (size,
+# axes, ticks, labels, legend) and only swaps the data in on later calls, so
+# renders from different sessions never share a figure and skip the setup.
+import io
+import threading
+
+PIE_LABELS = ["H", "E", "C"]
+STRUCTURE_NAMES = ["Helix", "Sheet", "Coil"]
+COLORS = ["gold", "skyblue", "lightgreen"]  # H, E, C
+BAR_WIDTH = 0.35
+
+class PieTemplate:
+    def __init__(self):
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        self.figure = Figure(figsize=(5, 5))
+        self.canvas = FigureCanvasAgg(self.figure)
+        self.ax = self.figure.add_subplot()
+        self.ax.set_aspect("equal")
+
+    def render(self, counts):
+        # counts: H, E, C residue counts; empty classes are left out
+        for artist in list(self.ax.patches) + list(self.ax.texts):
+            artist.remove()
+        shown = [i for i, count in enumerate(counts) if count > 0]
+        self.ax.pie([counts[i] for i in shown], labels=[PIE_LABELS[i] for i in shown],
+                    autopct="%1.1f%%", colors=[COLORS[i] for i in shown])
+        return png_bytes(self.figure)
+
+class BarTemplate:
+    def __init__(self):
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        self.figure = Figure(figsize=(6, 4))
+        self.canvas = FigureCanvasAgg(self.figure)
+        self.ax = self.figure.add_subplot()
+        index = range(len(STRUCTURE_NAMES))
+        zeros = [0] * len(STRUCTURE_NAMES)
+        self.predicted = self.ax.bar(index, zeros, BAR_WIDTH, label="Predicted", color="gold")
+        self.database = self.ax.bar([i + BAR_WIDTH for i in index], zeros, BAR_WIDTH, label="Database", color="skyblue")
+        self.ax.set_xlabel("Structure")
+        self.ax.set_ylabel("Proportion")
+        self.ax.set_xticks([i + BAR_WIDTH / 2 for i in index], STRUCTURE_NAMES)
+        self.ax.legend()
+        self.figure.tight_layout()
+
+    def render(self, predicted, database):
+        # predicted, database: H, E, C proportions
+        for bars, values in ((self.predicted, predicted), (self.database, database)):
+            for bar, value in zip(bars, values):
+                bar.set_height(value)
+        top = max(max(predicted), max(database))
+        self.ax.set_ylim(0, top * 1.05 if top > 0 else 1)
+        return png_bytes(self.figure)
+
+def png_bytes(figure):
+    buffer = io.BytesIO()
+    figure.savefig(buffer, format="png")
+    return buffer.getvalue()
+
+class ChartEngine:
+    def __init__(self):
+        self.local = threading.local()
+
+    def template(self, name, factory):
+        # This thread's template, built on first use
+        template = getattr(self.local, name, None)
+        if template is None:
+            template = factory()
+            setattr(self.local, name, template)
+        return template
+
+    def pie_chart(self, counts):
+        return self.template("pie", PieTemplate).render(list(counts))
+
+    def bar_chart(self, predicted, database):
+        return self.template("bar", BarTemplate).render(list(predicted), list(database))
+
+engine = ChartEngine()
@@ -0,0 +1,59 @@
+# app/services/chart_pool.py
+# Chart rendering fanned out to a pool of renderer processes. Each renderer
+# imports matplotlib and builds its chart templates when it starts, so charts
+# render side by side without paying that setup. Results come back as PNG
+# bytes; chart_cache stores them.
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from services.graph_service import render_chart
+
+CHART_WORKERS = int(os.getenv("POPVIZ_CHART_WORKERS", "3"))
+
+executor = None
+executor_lock = threading.Lock()
+
+def warm_up():
+    # Runs once in each renderer process
+    from services.chart_engine import engine
+    engine.pie_chart([1, 1, 1])
+    engine.bar_chart([0.3, 0.3, 0.4], [0.3, 0.3, 0.4])
+
+def get_executor():
+    global executor
+    with executor_lock:
+        if executor is None:
+            # spawn, not fork: the UI process has threads running that a forked child would not
+            executor = ProcessPoolExecutor(
+                max_workers=CHART_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=warm_up
+            )
+    return executor
+
+def start():
+    # Starts the renderers ahead of the first chart
+    pool = get_executor()
+    for _ in range(CHART_WORKERS):
+        pool.submit(int)
+
+def replace_executor(broken):
+    # A renderer died (OOM, killed): the pool refuses all further work, so start a new one
+    global executor
+    with executor_lock:
+        if executor is broken:
+            executor = None
+    broken.shutdown(wait=False, cancel_futures=True)
+
+def submit_chart(name, predicted_sequence, database_hec_avg):
+    # Future of the chart's PNG bytes (see graph_service.render_chart); retried once on a new pool
+    pool = get_executor()
+    try:
+        return pool.submit(render_chart, name, predicted_sequence, None, database_hec_avg)
+    except BrokenProcessPool:
+        print("Chart pool broken, starting a new one")
+        replace_executor(pool)
+        return get_executor().submit(render_chart, name, predicted_sequence, None, database_hec_avg)
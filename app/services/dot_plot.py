@@ -0,0 +1,151 @@
+# app/services/dot_plot.py
+# Structure dot plot rendered straight into a NumPy RGB buffer and encoded as
+# PNG, no matplotlib. The level of detail follows the sequence length so the
+# image stays within MAX_WIDTH x MAX_HEIGHT pixels:
+#   detail   - outlined dots, 10 (up to 30) per row, position labels every 20 residues
+#   compact  - one square of 1-8 pixels per residue, no labels
+#   binned   - one pixel per bin of residues, coloured by the bin's H/E/C mix
+# Very long sequences can also be written as full-detail tiles.
+import struct
+import zlib
+
+import numpy as np
+
+MAX_WIDTH = 1200
+MAX_HEIGHT = 4800
+
+DETAIL_CELL = 32         # dot cell size in pixels
+LABEL_BAND = 14          # space above each row of dots for position labels
+LABEL_EVERY = 20         # residues between position labels
+WRAP_SIZE = 10           # residues per row at full detail
+MAX_DETAIL_WRAP = 30
+TILE_RESIDUES = 3000     # residues per full-detail tile
+
+BACKGROUND = (255, 255, 255)
+OUTLINE = (0, 0, 0)
+COLORS = np.array([
+    (255, 215, 0),    # H, gold
+    (135, 206, 235),  # E, skyblue
+    (144, 238, 144),  # C, lightgreen
+], dtype=np.uint8)
+
+# 3x5 pixel digits for the position labels
+DIGITS = {
+    "0": ["111", "101", "101", "101", "111"],
+    "1": ["010", "110", "010", "010", "111"],
+    "2": ["111", "001", "111", "100", "111"],
+    "3": ["111", "001", "111", "001", "111"],
+    "4": ["101", "101", "111", "001", "001"],
+    "5": ["111", "100", "111", "001", "111"],
+    "6": ["111", "100", "111", "101", "111"],
+    "7": ["111", "001", "010", "010", "010"],
+    "8": ["111", "101", "111", "101", "111"],
+    "9": ["111", "101", "111", "001", "111"],
+}
+DIGIT_SCALE = 2
+
+def encode_png(rgb):
+    # 8-bit RGB PNG from an (height, width, 3) uint8 array
+    height, width, _ = rgb.shape
+    raw = np.zeros((height, width * 3 + 1), dtype=np.uint8)  # filter byte 0 per row
+    raw[:, 1:] = rgb.reshape(height, -1)
+
+    def chunk(tag, data):
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data) & 0xFFFFFFFF)
+
+    return (b"\x89PNG\r\n\x1a\n"
+            + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+            + chunk(b"IDAT", zlib.compress(raw.tobytes(), 6))
+            + chunk(b"IEND", b""))
+
+def dot_stamps(cell):
+    # (3, cell, cell, 3) images of an outlined dot per label
+    center = (cell - 1) / 2
+    y, x = np.mgrid[0:cell, 0:cell]
+    distance = np.hypot(x - center, y - center)
+    radius = cell / 2 - 1
+    stamps = np.empty((len(COLORS), cell, cell, 3), dtype=np.uint8)
+    stamps[:] = BACKGROUND
+    stamps[:, distance <= radius] = OUTLINE
+    inside = distance <= radius - 1.5
+    for code, color in enumerate(COLORS):
+        stamps[code, inside] = color
+    return stamps
+
+def draw_number(image, number, center_x, top):
+    text = str(number)
+    glyph_width = 3 * DIGIT_SCALE
+    x = int(center_x - (len(text) * (glyph_width + DIGIT_SCALE) - DIGIT_SCALE) / 2)
+    for char in text:
+        glyph = np.array([[bit == "1" for bit in row] for row in DIGITS[char]])
+        glyph = glyph.repeat(DIGIT_SCALE, axis=0).repeat(DIGIT_SCALE, axis=1)
+        region = image[top:top + glyph.shape[0], max(x, 0):x + glyph.shape[1]]
+        region[glyph[:region.shape[0], :region.shape[1]]] = OUTLINE
+        x += glyph_width + DIGIT_SCALE
+
+def grid(cells, wrap):
+    # (rows, wrap, ...) with the tail padded by repeating the background cell
+    rows = -(-len(cells) // wrap)
+    padded = np.empty((rows * wrap,) + cells.shape[1:], dtype=cells.dtype)
+    padded[:len(cells)] = cells
+    padded[len(cells):] = BACKGROUND
+    return padded.reshape((rows, wrap) + cells.shape[1:])
+
+def render_detail(labels, wrap=WRAP_SIZE, first_position=1):
+    # Outlined dots with position labels; first_position numbers the first residue
+    stamps = dot_stamps(DETAIL_CELL)
+    row_height = LABEL_BAND + DETAIL_CELL
+    cells = np.empty((len(labels), row_height, DETAIL_CELL, 3), dtype=np.uint8)
+    cells[:] = BACKGROUND
+    cells[:, LABEL_BAND:] = stamps[labels]
+
+    rows = grid(cells, wrap)
+    image = np.ascontiguousarray(rows.transpose(0, 2, 1, 3, 4)).reshape(len(rows) * row_height, wrap * DETAIL_CELL, 3)
+
+    # Labels above every LABEL_EVERY-th residue, counting from position 1
+    first_label = (-(first_position - 1)) % LABEL_EVERY
+    for i in range(first_label, len(labels), LABEL_EVERY):
+        row, col = divmod(i, wrap)
+        draw_number(image, first_position + i, (col + 0.5) * DETAIL_CELL, row * row_height + 2)
+    return image
+
+def render_compact(labels, cell):
+    # One cell x cell square per residue, as many per row as fit in MAX_WIDTH
+    wrap = MAX_WIDTH // cell
+    rows = grid(COLORS[labels], wrap)
+    return rows.repeat(cell, axis=0).repeat(cell, axis=1)
+
+def render_binned(labels, residues_per_pixel):
+    # Each pixel is the average colour of residues_per_pixel consecutive residues
+    bins = -(-len(labels) // residues_per_pixel)
+    padded = np.full(bins * residues_per_pixel, -1, dtype=np.int64)
+    padded[:len(labels)] = labels
+    padded = padded.reshape(bins, residues_per_pixel)
+    counts = np.stack([(padded == code).sum(axis=1) for code in range(len(COLORS))], axis=1)
+    colors = (counts @ COLORS.astype(np.float64)) / counts.sum(axis=1, keepdims=True)
+    return grid(colors.round().astype(np.uint8), MAX_WIDTH)
+
+def render_dot_plot(labels):
+    # RGB image of the whole sequence at the most detailed level that fits
+    labels = np.asarray(labels, dtype=np.intp)
+    n = len(labels)
+    if n == 0:
+        return np.full((1, 1, 3), 255, dtype=np.uint8)
+
+    row_height = LABEL_BAND + DETAIL_CELL
+    for wrap in range(WRAP_SIZE, MAX_DETAIL_WRAP + 1, WRAP_SIZE):
+        if -(-n // wrap) * row_height <= MAX_HEIGHT and wrap * DETAIL_CELL <= MAX_WIDTH:
+            return render_detail(labels, wrap)
+
+    for cell in range(8, 0, -1):
+        if -(-n // (MAX_WIDTH // cell)) * cell <= MAX_HEIGHT:
+            return render_compact(labels, cell)
+
+    return render_binned(labels, -(-n // (MAX_WIDTH * MAX_HEIGHT)))
+
+def render_tiles(labels, tile_residues=TILE_RESIDUES):
+    # Full-detail images of consecutive tile_residues-long stretches
+    labels = np.asarray(labels, dtype=np.intp)
+    wrap = MAX_DETAIL_WRAP
+    for first in range(0, len(labels), tile_residues):
+        yield render_detail(labels[first:first + tile_residues], wrap, first_position=first + 1)
@@ -1,113 +1,67 @@
 # app/services/graph_service.py
-import matplotlib.pyplot as plt
-import matplotlib
-import seaborn as sns
-import pandas as pd
 import os
-matplotlib.use("Agg")
+from services.structure_labels import string_to_labels, label_counts
+from services.dot_plot import render_dot_plot, render_tiles, encode_png
+from services.chart_engine import engine as chart_engine
 
 ASSETS_FOLDER = os.path.join(os.path.dirname(__file__), '..', 'assets')
 
-def generate_structure_dot_plot(sequence, prediction_uuid):
-    folder_path = os.path.join(ASSETS_FOLDER, prediction_uuid)
-    os.makedirs(folder_path, exist_ok=True)
-    save_path = os.path.join(folder_path, "structure.png")
-
-    # Configuration
-    wrap_size = 10  # Number of amino acids per line
-    num_lines = (len(sequence) + wrap_size - 1) // wrap_size  # Ceiling division
-
-    plt.figure(figsize=(wrap_size, num_lines * 1.5))  # Adjust figure size based on number of lines
-    colors = {'H': 'gold', 'E': 'skyblue', 'C': 'lightgreen'}
-
-    x = []
-    y = []
-    c = []
-
-    for i, label in enumerate(sequence):
-        row = i // wrap_size
-        col = i % wrap_size
-        x.append(col)
-        y.append(-row)  # negative so lines stack downward
-        c.append(colors.get(label, 'gray'))
-
-    plt.scatter(x, y, c=c, s=1000, edgecolors='black')
-
-    # Add position markers every 20 residues
-    for i in range(0, len(sequence), 20):
-        row = i // wrap_size
-        col = i % wrap_size
-        plt.text(
-            col, -row + 0.3,  # Slightly above the dot
-            str(i + 1),       # 1-based index
-            fontsize=18,
-            ha='center',
-            va='bottom',
-            color='black'
-        )
-
-    plt.axis('off')
-    plt.savefig(save_path, bbox_inches='tight')
-    plt.close()
-
-
-
-def generate_pie_chart(sequence, prediction_uuid):
-    from collections import Counter
-    folder_path = os.path.join(ASSETS_FOLDER, prediction_uuid)
-    os.makedirs(folder_path, exist_ok=True)
-    save_path = os.path.join(folder_path, "pie_chart.png")
-
-    counts = Counter(sequence)
-    label_order = ['H', 'E', 'C']
-    sizes = [counts.get(label, 0) for label in label_order]
-
-    filtered_labels = [label for label, size in zip(label_order, sizes) if size > 0]
-    filtered_sizes = [size for size in sizes if size > 0]
-    filtered_colors = []
-    for label in filtered_labels:
-        if label == 'H':
-            filtered_colors.append('gold')
-        elif label == 'E':
-            filtered_colors.append('skyblue')
-        elif label == 'C':
-            filtered_colors.append('lightgreen')
-
-    plt.figure(figsize=(5, 5))
-    plt.pie(filtered_sizes, labels=filtered_labels, autopct='%1.1f%%', colors=filtered_colors)
-    plt.savefig(save_path, bbox_inches='tight')
-    plt.close()
-
-def generate_bar_chart(sequence, database_hec_avg, prediction_uuid):
-    from collections import Counter
-    folder_path = os.path.join(ASSETS_FOLDER, prediction_uuid)
+# Example known averages: H, E, C proportions in the reference database
+DATABASE_HEC_AVG = [0.4, 0.3, 0.3]
+
+def structure_dot_plot_png(sequence, labels=None):
+    """PNG bytes of the structure dot plot"""
+    if labels is None:
+        labels = string_to_labels(sequence)
+    return encode_png(render_dot_plot(labels))
+
+def pie_chart_png(sequence, labels=None):
+    """PNG bytes of the H/E/C pie chart"""
+    counts = label_counts(string_to_labels(sequence) if labels is None else labels).tolist()
+    return chart_engine.pie_chart(counts)
+
+def bar_chart_png(sequence, database_hec_avg=DATABASE_HEC_AVG, labels=None):
+    """PNG bytes of the predicted vs database proportions bar chart"""
+    counts = label_counts(string_to_labels(sequence) if labels is None else labels)
+    sequence_avg = (counts / len(sequence)).tolist()
+    return chart_engine.bar_chart(sequence_avg, database_hec_avg)
+
+CHART_FILES = ["structure.png", "pie_chart.png", "bar_chart.png"]
+
+def render_chart(name, sequence, labels=None, database_hec_avg=DATABASE_HEC_AVG):
+    """PNG bytes of the chart stored as the given file name"""
+    if name == "structure.png":
+        return structure_dot_plot_png(sequence, labels)
+    if name == "pie_chart.png":
+        return pie_chart_png(sequence, labels)
+    if name == "bar_chart.png":
+        return bar_chart_png(sequence, database_hec_avg, labels)
+    raise ValueError(f"Unknown chart: {name}")
+
+def write_chart(png, prediction_uuid, name, assets_folder=ASSETS_FOLDER):
+    folder_path = os.path.join(assets_folder, prediction_uuid)
     os.makedirs(folder_path, exist_ok=True)
-    save_path = os.path.join(folder_path, "bar_chart.png")
-
-    counts = Counter(sequence)
-    labels = ['H', 'E', 'C']
-    sequence_avg = [counts.get(l, 0) / len(sequence) for l in labels]
-
-    df = pd.DataFrame({
-        "Structure": ["Helix", "Sheet", "Coil"],
-        "Predicted": sequence_avg,
-        "Database": database_hec_avg
-    })
-
-    plt.figure(figsize=(6, 4))
-    bar_width = 0.35
-    index = range(len(df))
-
-    plt.bar(index, df['Predicted'], bar_width, label='Predicted', color='gold')
-    plt.bar([i + bar_width for i in index], df['Database'], bar_width, label='Database', color='skyblue')
-
-    plt.xlabel('Structure')
-    plt.ylabel('Proportion')
-    plt.xticks([i + bar_width/2 for i in index], df['Structure'])
-    plt.legend()
-    plt.tight_layout()
-    plt.savefig(save_path, bbox_inches='tight')
-    plt.close()
+    with open(os.path.join(folder_path, name), "wb") as f:
+        f.write(png)
+    return png
+
+def generate_structure_dot_plot(sequence, prediction_uuid, assets_folder=ASSETS_FOLDER, labels=None, tiles=False):
+    """Write structure.png, plus full-detail structure_tile_<n>.png files when tiles is set; returns the structure.png bytes"""
+    if labels is None:
+        labels = string_to_labels(sequence)
+    png = write_chart(structure_dot_plot_png(sequence, labels), prediction_uuid, "structure.png", assets_folder)
+    if tiles:
+        for i, tile in enumerate(render_tiles(labels)):
+            write_chart(encode_png(tile), prediction_uuid, f"structure_tile_{i}.png", assets_folder)
+    return png
+
+def generate_pie_chart(sequence, prediction_uuid, assets_folder=ASSETS_FOLDER, labels=None):
+    """Write pie_chart.png; returns its bytes"""
+    return write_chart(pie_chart_png(sequence, labels), prediction_uuid, "pie_chart.png", assets_folder)
+
+def generate_bar_chart(sequence, database_hec_avg, prediction_uuid, assets_folder=ASSETS_FOLDER, labels=None):
+    """Write bar_chart.png; returns its bytes"""
+    return write_chart(bar_chart_png(sequence, database_hec_avg, labels), prediction_uuid, "bar_chart.png", assets_folder)
 
 def delete_prediction_graphs(prediction_uuid):
     """Delete the prediction folder for the given UUID"""
@@ -0,0 +1,214 @@
+# app/services/incremental.py
+# Re-prediction after an edit. A run keeps its per-window probabilities and
+# suppression decisions in a PredictionState; the next run for the same
+# organism diffs the sequences, re-infers only the windows that touch the
+# edited stretch, shifts the rest, and re-runs suppression in a region around
+# the edit that grows until the decisions at its borders agree with the old
+# ones. The result is the same as prediction_algo.on_predict on the new sequence.
+import numpy as np
+
+from services import prediction_algo
+from services.suppression import overlaps_kept
+
+# Above this share of edited residues a full run is cheaper
+FULL_RUN_FRACTION = 0.5
+
+# Progress reported through on_stage(stage, fraction): inference runs from
+# INFER_FRACTION to SELECT_FRACTION, in at least PROGRESS_CHUNKS chunks of at
+# least MIN_CHUNK_POSITIONS start positions so the bar moves on short sequences too
+INFER_FRACTION = 0.05
+SELECT_FRACTION = 0.8
+PROGRESS_CHUNKS = 20
+MIN_CHUNK_POSITIONS = 64
+
+class PredictionState:
+    def __init__(self, organism_name, sequence, probs, kept, artifacts):
+        # probs: (window lengths, len(sequence), classes) float32 and kept: (window lengths,
+        # len(sequence)) bool, indexed by [length - MIN_WINDOW, start]; only windows
+        # that fit in the sequence are meaningful. artifacts: what produced probs
+        self.artifacts = artifacts
+        self.organism_name = organism_name
+        self.sequence = sequence
+        self.probs = probs
+        self.kept = kept
+
+def window_grid(n, first_start=0, stop_start=None):
+    # (lengths, starts, valid) arrays shaped like PredictionState.kept[:, first_start:stop_start]
+    # for a sequence of n residues
+    stop_start = n if stop_start is None else stop_start
+    lengths = np.arange(prediction_algo.MIN_WINDOW, prediction_algo.MAX_WINDOW + 1)[:, None]
+    starts = np.arange(first_start, stop_start)[None, :]
+    shape = (lengths.shape[0], starts.shape[1])
+    return np.broadcast_to(lengths, shape), np.broadcast_to(starts, shape), starts + lengths <= n
+
+def codepoints(sequence):
+    return np.frombuffer(sequence.encode("utf-32-le"), dtype=np.uint32)
+
+def edit_region(old, new):
+    # (prefix, old_stop, new_stop): old[:prefix] == new[:prefix] and old[old_stop:] == new[new_stop:]
+    old_codes, new_codes = codepoints(old), codepoints(new)
+    limit = min(len(old_codes), len(new_codes))
+    mismatch = np.flatnonzero(old_codes[:limit] != new_codes[:limit])
+    prefix = int(mismatch[0]) if len(mismatch) else limit
+    tail_limit = limit - prefix
+    mismatch = np.flatnonzero(old_codes[len(old_codes) - tail_limit:][::-1] != new_codes[len(new_codes) - tail_limit:][::-1])
+    suffix = int(mismatch[0]) if len(mismatch) else tail_limit
+    return prefix, len(old) - suffix, len(new) - suffix
+
+def infer_windows(org_encoded, sequence, probs, first_start, stop_start, on_chunk=None):
+    # Fills probs[:, first_start:stop_start] for every window length, at most one streaming-sized
+    # chunk at a time. on_chunk(done, total) is called after each chunk with counts of start
+    # positions; with a callback the range is split into about PROGRESS_CHUNKS chunks.
+    chunk_positions = max(1, prediction_algo.STREAM_CHUNK_WINDOWS // len(probs))
+    if on_chunk:
+        chunk_positions = min(chunk_positions, max(MIN_CHUNK_POSITIONS, -(-(stop_start - first_start) // PROGRESS_CHUNKS)))
+    for chunk_start in range(first_start, stop_start, chunk_positions):
+        chunk_stop = min(chunk_start + chunk_positions, stop_start)
+        windows = prediction_algo.windows_in_range(sequence, chunk_start, chunk_stop)
+        chunk_probs = prediction_algo.predict_probs(prediction_algo.build_features(org_encoded, windows))
+        probs[windows.lengths - prediction_algo.MIN_WINDOW, windows.starts] = chunk_probs
+        if on_chunk:
+            on_chunk(chunk_stop - first_start, stop_start - first_start)
+
+def priority_order(lengths, starts, confidences):
+    # Confidence descending, ties in sliding_windows order (length, then start)
+    return np.lexsort((starts, lengths, -confidences))
+
+def suppress_region(state_kept, probs, n, first_start, stop_start, iou_threshold=0.2):
+    # Re-decides the windows starting in [first_start, stop_start) and writes them into
+    # state_kept, keeping every other window's old decision. Returns False (leaving
+    # state_kept partly updated) if a window next to the region would now be decided
+    # differently, i.e. the region has to grow.
+    max_len = prediction_algo.MAX_WINDOW
+    context_first = max(0, first_start - 2 * max_len)
+    context_stop = min(n, stop_start + 2 * max_len)
+
+    lengths, _, valid = window_grid(n, context_first, context_stop)
+    k_idx, t_idx = np.nonzero(valid)
+    window_lengths = lengths[k_idx, t_idx]
+    t_idx = t_idx + context_first
+    order = priority_order(window_lengths, t_idx, probs[k_idx, t_idx].max(axis=1))
+
+    kept_ends = {}  # start -> ends of windows kept so far in this pass
+    for i in order.tolist():
+        k = int(k_idx[i])
+        start = int(t_idx[i])
+        end = start + int(window_lengths[i])
+
+        # Region windows and the neighbours that can overlap them are decided here
+        if first_start - max_len < start < stop_start + max_len - 1:
+            other_starts = range(max(start - max_len + 1, context_first), min(end, context_stop))
+            keep = not overlaps_kept(start, end, kept_ends, other_starts, iou_threshold)
+            if first_start <= start < stop_start:
+                state_kept[k, start] = keep
+            elif keep != state_kept[k, start]:
+                # A neighbour of the region changes its decision
+                return False
+        else:
+            # Outer context: its neighbours outside the region did not change
+            keep = state_kept[k, start]
+
+        if keep:
+            kept_ends.setdefault(start, []).append(end)
+    return True
+
+def report_stage(on_stage, stage, fraction):
+    if on_stage:
+        on_stage(stage, fraction)
+
+def inference_progress(on_stage):
+    # on_chunk callback for infer_windows that reports through on_stage
+    if not on_stage:
+        return None
+
+    def on_chunk(done, total):
+        on_stage(f"Running model... ({done}/{total} residues)",
+                 INFER_FRACTION + (SELECT_FRACTION - INFER_FRACTION) * done / total)
+    return on_chunk
+
+def full_run(organism_name, sequence, on_stage=None):
+    report_stage(on_stage, "Encoding sequence...", 0.0)
+    org_encoded = prediction_algo.encode_organism(organism_name)
+    n = len(sequence)
+    num_lengths = prediction_algo.MAX_WINDOW - prediction_algo.MIN_WINDOW + 1
+    num_classes = len(prediction_algo.artifacts().label_classes)
+
+    probs = np.zeros((num_lengths, n, num_classes), dtype=np.float32)
+    report_stage(on_stage, "Running model...", INFER_FRACTION)
+    infer_windows(org_encoded, sequence, probs, 0, n, inference_progress(on_stage))
+
+    report_stage(on_stage, "Selecting structures...", SELECT_FRACTION)
+    lengths, starts, valid = window_grid(n)
+    kept = np.zeros((num_lengths, n), dtype=bool)
+    # Flattened in sliding_windows order (length, then start)
+    k_idx, t_idx = np.nonzero(valid)
+    keep = prediction_algo.suppress_overlapping(t_idx, t_idx + lengths[k_idx, t_idx], probs[k_idx, t_idx].max(axis=1))
+    kept[k_idx[keep], t_idx[keep]] = True
+    return PredictionState(organism_name, sequence, probs, kept, prediction_algo.artifacts())
+
+def incremental_run(previous, sequence, on_stage=None):
+    # Returns the new PredictionState, or None when a full run is the better choice
+    report_stage(on_stage, "Encoding sequence...", 0.0)
+    old = previous.sequence
+    prefix, old_stop, new_stop = edit_region(old, sequence)
+    n = len(sequence)
+    if new_stop - prefix > FULL_RUN_FRACTION * max(n, 1) or old_stop - prefix > FULL_RUN_FRACTION * max(len(old), 1):
+        return None
+
+    max_len = prediction_algo.MAX_WINDOW
+    shift = len(sequence) - len(old)
+    # Windows starting before first_start end inside the common prefix; windows
+    # starting at or after stop_start lie inside the common suffix
+    first_start = max(0, prefix - max_len + 1)
+    stop_start = max(first_start, new_stop)
+
+    num_lengths, _, num_classes = previous.probs.shape
+    probs = np.zeros((num_lengths, n, num_classes), dtype=np.float32)
+    kept = np.zeros((num_lengths, n), dtype=bool)
+    probs[:, :first_start] = previous.probs[:, :first_start]
+    kept[:, :first_start] = previous.kept[:, :first_start]
+    probs[:, stop_start:] = previous.probs[:, stop_start - shift:]
+    kept[:, stop_start:] = previous.kept[:, stop_start - shift:]
+
+    org_encoded = prediction_algo.encode_organism(previous.organism_name)
+    report_stage(on_stage, "Running model...", INFER_FRACTION)
+    infer_windows(org_encoded, sequence, probs, first_start, stop_start, inference_progress(on_stage))
+
+    report_stage(on_stage, "Selecting structures...", SELECT_FRACTION)
+    # Grow the suppression region until its borders agree with the old decisions
+    region_first, region_stop = first_start, stop_start
+    while True:
+        attempt = kept.copy()
+        if suppress_region(attempt, probs, n, region_first, region_stop):
+            kept = attempt
+            break
+        region_first = max(0, region_first - 2 * max_len)
+        region_stop = min(n, region_stop + 2 * max_len)
+    return PredictionState(previous.organism_name, sequence, probs, kept, previous.artifacts)
+
+def state_predictions(state):
+    # Final predictions in on_predict's format and order
+    lengths, starts, valid = window_grid(len(state.sequence))
+    k_idx, t_idx = np.nonzero(state.kept & valid)
+    probs = state.probs[k_idx, t_idx]
+    window_lengths = lengths[k_idx, t_idx]
+    confidences = probs.max(axis=1)
+    order = priority_order(window_lengths, t_idx, confidences)
+    return prediction_algo.build_predictions(t_idx[order], (t_idx + window_lengths)[order],
+                                             probs.argmax(axis=1)[order], confidences[order])
+
+def on_predict_incremental(organism_name, full_sequence, previous=None, on_stage=None):
+    # Returns (final predictions, state for the next call). previous is the state of
+    # an earlier run; it is only reused for the same organism and loaded model.
+    # on_stage(stage, fraction) reports encoding, inference (per chunk) and suppression,
+    # with fraction going from 0 to SELECT_FRACTION.
+    full_sequence = full_sequence.strip()
+    state = None
+    if (previous is not None and previous.organism_name == organism_name
+            and previous.artifacts is prediction_algo.artifacts()):
+        state = incremental_run(previous, full_sequence, on_stage)
+        if state is not None:
+            print(f"Prediction algo incremental: edit at {edit_region(previous.sequence, full_sequence)}")
+    if state is None:
+        state = full_run(organism_name, full_sequence, on_stage)
+    return state_predictions(state), state
@@ -0,0 +1,64 @@
+# app/services/inference_server.py
+# Single inference actor shared by all sessions. Requests arriving within a
+# short window are merged into one model call and each caller gets its own
+# slice of the probabilities back.
+import numpy as np
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+class MicroBatcher:
+    def __init__(self, predict_fn, window_ms=5, max_rows=1_000_000):
+        # predict_fn(X) -> probs, only ever called from the actor thread
+        self.predict_fn = predict_fn
+        self.window = window_ms / 1000
+        self.max_rows = max_rows
+        self.requests = queue.Queue()
+        self.thread = None
+        self.lock = threading.Lock()
+
+    def start(self):
+        with self.lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, name="inference-server", daemon=True)
+                self.thread.start()
+
+    def predict(self, X):
+        # Blocks until the merged batch containing X has been predicted
+        self.start()
+        future = Future()
+        self.requests.put((X, future))
+        return future.result()
+
+    def collect(self):
+        # Waits for one request, then gathers more until the window closes or max_rows is reached
+        batch = [self.requests.get()]
+        rows = len(batch[0][0])
+        deadline = time.monotonic() + self.window
+        while rows < self.max_rows:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                item = self.requests.get(timeout=timeout)
+            except queue.Empty:
+                break
+            batch.append(item)
+            rows += len(item[0])
+        return batch
+
+    def run(self):
+        while True:
+            batch = self.collect()
+            try:
+                probs = self.predict_fn(np.concatenate([X for X, _ in batch]))
+            except Exception as ex:
+                for _, future in batch:
+                    future.set_exception(ex)
+                continue
+
+            offset = 0
+            for X, future in batch:
+                future.set_result(probs[offset:offset + len(X)])
+                offset += len(X)
@@ -0,0 +1,74 @@
+# app/services/kmer_index.py
+# Sorted-array index over the subsequence encodemap. Each k-mer is turned into
+# an integer key (its letters as digits of a base-B number, plus an offset per
+# length), so the codes of every window of a sequence come from rolling the
+# keys forward with NumPy and one np.searchsorted, instead of a dict lookup
+# and a substring per window.
+import numpy as np
+
+class KmerIndex:
+    def __init__(self, encoder, min_len, max_len):
+        # encoder: {subsequence: code}; only keys of min_len..max_len letters can match a window
+        self.min_len = min_len
+        self.max_len = max_len
+        kmers = [kmer for kmer in encoder if min_len <= len(kmer) <= max_len and kmer.isascii()]
+
+        # Digit per ASCII character (sequence_windows.residue_codes maps the rest to 0);
+        # 0 marks characters that appear in no k-mer, so windows containing them
+        # get keys that match nothing
+        alphabet = sorted(set("".join(kmers)))
+        self.base = len(alphabet) + 1
+        self.digits = np.zeros(128, dtype=np.int64)
+        self.digits[[ord(char) for char in alphabet]] = np.arange(1, self.base)
+        # Keys of different lengths are kept apart by a per-length offset
+        self.length_offsets = np.arange(max_len + 1, dtype=np.int64) * self.base ** max_len
+
+        keys = np.array([self.key(kmer) for kmer in kmers], dtype=np.int64)
+        values = np.array([encoder[kmer] for kmer in kmers], dtype=float)
+        order = np.argsort(keys)
+        self.keys = keys[order]
+        self.values = values[order]
+
+    @classmethod
+    def from_arrays(cls, keys, values, digits, base, min_len, max_len):
+        # Rebuilds an index from the arrays of an existing one (e.g. from the artifact bundle)
+        index = cls.__new__(cls)
+        index.min_len = min_len
+        index.max_len = max_len
+        index.base = base
+        index.digits = digits
+        index.length_offsets = np.arange(max_len + 1, dtype=np.int64) * base ** max_len
+        index.keys = keys
+        index.values = values
+        return index
+
+    def key(self, kmer):
+        value = 0
+        for char in kmer:
+            value = value * self.base + int(self.digits[ord(char)])
+        return value + int(self.length_offsets[len(kmer)])
+
+    def window_keys(self, windows):
+        # Keys of a SequenceWindows' windows (at most max_len long), in its order
+        digits = self.digits[windows.residues]
+
+        keys = []
+        rolling = digits
+        for length in range(1, windows.max_len + 1):
+            if length > 1:
+                # Keys of length-k windows from the length-(k-1) ones: shift one digit, add the next letter
+                rolling = rolling[:-1] * self.base + digits[length - 1:]
+            if length >= windows.min_len:
+                keys.append(rolling[:windows.count(length)] + self.length_offsets[length])
+        return np.concatenate(keys) if keys else np.empty(0, dtype=np.int64)
+
+    def lookup(self, keys, default=0.0):
+        if len(self.keys) == 0:
+            return np.full(len(keys), default, dtype=float)
+        positions = np.minimum(np.searchsorted(self.keys, keys), len(self.keys) - 1)
+        found = self.keys[positions] == keys
+        return np.where(found, self.values[positions], default)
+
+    def codes(self, windows, default=0.0):
+        # Encoded value of every window, `default` for subsequences not in the encoder
+        return self.lookup(self.window_keys(windows), default)
@@ -0,0 +1,133 @@
+# app/services/model_registry.py
+# Loads model artifacts on a background thread, reports a readiness state the
+# UI can show, and reloads them when the files they come from change.
+import hashlib
+import os
+import threading
+import time
+
+IDLE = "idle"
+LOADING = "loading"
+READY = "ready"
+FAILED = "failed"
+
+RELOAD_POLL_SECONDS = float(os.getenv("POPVIZ_RELOAD_POLL_SECONDS", "2"))
+
+def directory_signature(path):
+    # (relative path, size, mtime) of every file under path
+    files = []
+    for root, _, names in os.walk(path):
+        for name in names:
+            file_path = os.path.join(root, name)
+            try:
+                stat = os.stat(file_path)
+            except OSError:
+                continue
+            files.append((os.path.relpath(file_path, path), stat.st_size, stat.st_mtime_ns))
+    return sorted(files)
+
+def directory_digest(path, signature):
+    # Hash of the contents of the files in signature; identical files give the same digest
+    digest = hashlib.sha256()
+    for rel_path, _, _ in signature:
+        try:
+            with open(os.path.join(path, rel_path), "rb") as f:
+                data = f.read()
+        except OSError:
+            continue
+        digest.update(rel_path.encode())
+        digest.update(hashlib.sha256(data).digest())
+    return digest.hexdigest()
+
+class ModelRegistry:
+    def __init__(self, load_fn, warm_up_fn=None, watch_dir=None):
+        # load_fn() returns the artifacts; warm_up_fn(artifacts) runs a first inference
+        self.load_fn = load_fn
+        self.warm_up_fn = warm_up_fn
+        self.watch_dir = watch_dir
+        self.state = IDLE
+        self.error = None
+        self.artifacts = None
+        self.listeners = []
+        self.ready_event = threading.Event()
+        self.lock = threading.Lock()
+        self.loader = None
+        self.watcher = None
+        self.signature = None
+        self.version = None  # digest of watch_dir's files when the current artifacts were loaded
+
+    def add_listener(self, callback):
+        # callback(state) is called from the loader thread on every state change
+        self.listeners.append(callback)
+
+    def remove_listener(self, callback):
+        if callback in self.listeners:
+            self.listeners.remove(callback)
+
+    def set_state(self, state, error=None):
+        self.state = state
+        self.error = error
+        for callback in list(self.listeners):
+            try:
+                callback(state)
+            except Exception as ex:
+                print(f"Model registry listener failed: {ex}")
+
+    def start(self, watch=False):
+        # Starts loading in the background (once); watch=True also polls watch_dir for changes
+        with self.lock:
+            if self.loader is None:
+                self.loader = threading.Thread(target=self.load, name="model-loader", daemon=True)
+                self.loader.start()
+            if watch and self.watch_dir and self.watcher is None:
+                self.watcher = threading.Thread(target=self.watch, name="model-watcher", daemon=True)
+                self.watcher.start()
+
+    def load(self):
+        reloading = self.artifacts is not None
+        if not reloading:
+            # Starting over after a failure: get() waits for this attempt instead of re-raising
+            self.ready_event.clear()
+            self.set_state(LOADING)
+        # Remembered even if loading fails, so the watcher retries only after another change
+        self.signature = directory_signature(self.watch_dir) if self.watch_dir else None
+        version = directory_digest(self.watch_dir, self.signature) if self.watch_dir else None
+        try:
+            started = time.perf_counter()
+            artifacts = self.load_fn()
+            if self.warm_up_fn:
+                self.warm_up_fn(artifacts)
+        except Exception as ex:
+            print(f"Model loading failed: {ex}")
+            if reloading:
+                # Keep serving the artifacts that were already loaded
+                return
+            self.set_state(FAILED, str(ex))
+            self.ready_event.set()
+            return
+
+        with self.lock:
+            self.artifacts = artifacts
+            self.version = version
+        print(f"Model artifacts {'reloaded' if reloading else 'loaded'} in {time.perf_counter() - started:.2f}s")
+        self.set_state(READY)
+        self.ready_event.set()
+
+    def watch(self):
+        while True:
+            time.sleep(RELOAD_POLL_SECONDS)
+            if self.state == LOADING:
+                continue
+            if directory_signature(self.watch_dir) != self.signature:
+                self.load()
+
+    def get(self, timeout=None):
+        # Returns the loaded artifacts, loading them first if nobody has started yet
+        if self.artifacts is not None:
+            return self.artifacts
+        self.start()
+        if not self.ready_event.wait(timeout):
+            raise TimeoutError("Model artifacts are still loading.")
+        if self.artifacts is None:
+            raise RuntimeError(f"Model artifacts failed to load: {self.error}")
+        return self.artifacts
@@ -0,0 +1,187 @@
+# app/services/numpy_model.py
+# Pure-NumPy forward pass for the Keras model in ML/predictor/nn_model.pkl,
+# so inference does not need TensorFlow at runtime.
+#
+# Export (needs TensorFlow once, run from the POPViz directory):
+#     python app/services/numpy_model.py
+import numpy as np
+import hashlib
+import json
+import os
+
+model_path = "ML/predictor/nn_model.pkl"
+numpy_model_path = "ML/predictor/nn_model.npz"
+
+SUPPORTED_LAYERS = {"InputLayer", "Conv1D", "MaxPooling1D", "Flatten", "Dense", "Dropout"}
+
+def file_sha256(path):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+def files_sha256(paths):
+    # One digest over several files, in order
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, "rb") as f:
+            digest.update(hashlib.sha256(f.read()).digest())
+    return digest.hexdigest()
+
+def relu(x):
+    return np.maximum(x, 0)
+
+def softmax(x):
+    e = np.exp(x - x.max(axis=-1, keepdims=True))
+    return e / e.sum(axis=-1, keepdims=True)
+
+def sigmoid(x):
+    return 1 / (1 + np.exp(-x))
+
+ACTIVATIONS = {
+    "linear": lambda x: x,
+    "relu": relu,
+    "softmax": softmax,
+    "sigmoid": sigmoid,
+    "tanh": np.tanh,
+}
+
+def dense(x, kernel):
+    # x @ kernel, accumulated one input feature at a time. BLAS matmul results
+    # depend on how the batch gets blocked; this way every row comes out the
+    # same no matter which other rows it is batched with.
+    out = x[..., 0:1] * kernel[0]
+    for j in range(1, kernel.shape[0]):
+        out += x[..., j:j + 1] * kernel[j]
+    return out
+
+def conv1d(x, kernel, bias, padding):
+    # x: (n, length, in_channels), kernel: (kernel_size, in_channels, filters), stride 1
+    kernel_size = kernel.shape[0]
+    if padding == "same":
+        left = (kernel_size - 1) // 2
+        x = np.pad(x, ((0, 0), (left, kernel_size - 1 - left), (0, 0)))
+    out_len = x.shape[1] - kernel_size + 1
+    out = np.zeros((x.shape[0], out_len, kernel.shape[2]), dtype=x.dtype)
+    for j in range(kernel_size):
+        out += dense(x[:, j:j + out_len, :], kernel[j])
+    return out + bias
+
+def max_pool1d(x, pool_size, strides):
+    out_len = (x.shape[1] - pool_size) // strides + 1
+    out = x[:, 0:(out_len - 1) * strides + 1:strides, :]
+    for j in range(1, pool_size):
+        out = np.maximum(out, x[:, j:j + (out_len - 1) * strides + 1:strides, :])
+    return out
+
+class NumpyModel:
+    def __init__(self, layers, input_shape):
+        # layers: list of (spec dict, [weight arrays]) in model order
+        self.layers = layers
+        self.input_shape = input_shape
+
+    def forward(self, X):
+        x = np.asarray(X, dtype=np.float32)
+        # Same as Keras: 2D feature rows feed a (length, 1) input
+        if len(self.input_shape) == 2 and x.ndim == 2:
+            x = x[:, :, None]
+
+        for spec, weights in self.layers:
+            layer_type = spec["type"]
+            if layer_type == "Conv1D":
+                x = conv1d(x, weights[0], weights[1], spec["padding"])
+            elif layer_type == "MaxPooling1D":
+                x = max_pool1d(x, spec["pool_size"], spec["strides"])
+            elif layer_type == "Flatten":
+                x = x.reshape(len(x), -1)
+            elif layer_type == "Dense":
+                x = dense(x, weights[0]) + weights[1]
+
+            if "activation" in spec:
+                x = ACTIVATIONS[spec["activation"]](x)
+        return x
+
+    def predict(self, X, batch_size=None, verbose=0):
+        # Mirrors model.predict so prediction_algo can use either engine
+        if batch_size is None or len(X) <= batch_size:
+            return self.forward(X)
+        return np.concatenate([self.forward(X[i:i + batch_size]) for i in range(0, len(X), batch_size)])
+
+def export_model(model, output_path=numpy_model_path, source_path=model_path):
+    layers = []
+    arrays = {}
+    for i, layer in enumerate(model.layers):
+        layer_type = type(layer).__name__
+        if layer_type not in SUPPORTED_LAYERS:
+            raise ValueError(f"Layer type '{layer_type}' is not supported by the NumPy engine.")
+
+        config = layer.get_config()
+        spec = {"type": layer_type}
+        if layer_type == "Conv1D":
+            if tuple(config["strides"]) != (1,) or tuple(config["dilation_rate"]) != (1,):
+                raise ValueError("Only stride 1, undilated Conv1D layers are supported.")
+            spec["padding"] = config["padding"]
+        elif layer_type == "MaxPooling1D":
+            if config["padding"] != "valid":
+                raise ValueError("Only 'valid' MaxPooling1D layers are supported.")
+            spec["pool_size"] = int(config["pool_size"][0])
+            spec["strides"] = int(config["strides"][0])
+        if config.get("activation") not in (None, "linear"):
+            spec["activation"] = config["activation"]
+
+        weights = layer.get_weights()
+        spec["num_weights"] = len(weights)
+        for j, w in enumerate(weights):
+            arrays[f"layer{i}_w{j}"] = np.asarray(w, dtype=np.float32)
+        layers.append(spec)
+
+    meta = {
+        "layers": layers,
+        "input_shape": list(model.input_shape[1:]),
+        "source_sha256": file_sha256(source_path),
+    }
+    np.savez(output_path, meta=np.array(json.dumps(meta)), **arrays)
+    return output_path
+
+def load_numpy_model(path=numpy_model_path, source_path=model_path):
+    # Returns None when the export is missing or was made from a different nn_model.pkl
+    if not os.path.exists(path):
+        return None
+
+    with np.load(path) as data:
+        meta = json.loads(str(data["meta"]))
+        if os.path.exists(source_path) and meta["source_sha256"] != file_sha256(source_path):
+            print(f"Ignoring stale NumPy model export: {path}")
+            return None
+        layers = []
+        for i, spec in enumerate(meta["layers"]):
+            weights = [data[f"layer{i}_w{j}"] for j in range(spec["num_weights"])]
+            layers.append((spec, weights))
+
+    return NumpyModel(layers, meta["input_shape"])
+
+def check_parity(keras_model, numpy_model, X, atol=1e-5):
+    expected = keras_model.predict(X, verbose=0)
+    actual = numpy_model.predict(X)
+    max_diff = float(np.abs(expected - actual).max())
+    if max_diff > atol or not np.array_equal(expected.argmax(axis=1), actual.argmax(axis=1)):
+        raise AssertionError(f"NumPy model does not match Keras output (max abs diff {max_diff})")
+    return max_diff
+
+if __name__ == "__main__":
+    import joblib
+
+    keras_model = joblib.load(model_path)
+    export_model(keras_model)
+    numpy_model = load_numpy_model()
+
+    # Random rows plus rows shaped like real features (encoded values, scaled lengths)
+    rng = np.random.default_rng(0)
+    X = np.concatenate([
+        rng.normal(size=(5000, 3)),
+        np.column_stack([rng.uniform(0, 2, 5000), rng.uniform(0, 3, 5000), rng.uniform(-1, 0, 5000)]),
+    ])
+    try:
+        max_diff = check_parity(keras_model, numpy_model, X)
+    except AssertionError:
+        os.remove(numpy_model_path)
+        raise
+    print(f"Exported {numpy_model_path} (max abs diff vs Keras: {max_diff:.2e})")
@@ -1,36 +1,185 @@
 import numpy as np
-import joblib
 import json
 import os
-import pandas as pd
+from services.kmer_index import KmerIndex
+from services.sequence_windows import SequenceWindows
+from services.suppression import suppress_overlapping, StreamingSuppressor
+from services.numpy_model import load_numpy_model, NumpyModel
+from services.prob_table import load_probability_table, ProbabilityTable
+from services.artifact_bundle import load_bundle
+from services.inference_server import MicroBatcher
+from services.model_registry import ModelRegistry
+from services.structure_labels import paint_labels, labels_to_string, HEC, COIL
+from types import SimpleNamespace
 # from tensorflow.keras.models import load_model
 
-# Load encoders and model once at import
 organism_encoder_path = "ML/predictor/Organism_encodemap.json"
 subsequence_encoder_path = "ML/predictor/subsequence_encodemap.json"
 scaler_path = "ML/predictor/scaler.pkl"
 label_encoder_path = "ML/predictor/label_encoder.pkl"
 model_path = "ML/predictor/nn_model.pkl"
+model_dir = "ML/predictor"
 
-with open(organism_encoder_path, "r") as f:
-    organism_encoder = json.load(f)
-    
-with open(subsequence_encoder_path, "r") as f:
-    subsequence_encoder = json.load(f)
-
-scaler = joblib.load(scaler_path)
-label_encoder = joblib.load(label_encoder_path)
-model = joblib.load(model_path)
-
-def sliding_windows(sequence, min_len=3, max_len=7):
-    windows = []
-    n = len(sequence)
-    for length in range(min_len, max_len + 1):
-        for start in range(0, n - length + 1):
-            end = start + length
-            subseq = sequence[start:end]
-            windows.append((start, end, subseq))
-    return windows
+# "model" runs the network, "table" gathers from the precomputed probability table
+INFERENCE_MODE = os.getenv("POPVIZ_INFERENCE_MODE", "model")
+
+MIN_WINDOW = 3
+MAX_WINDOW = 7
+
+# Rows per model.predict call and per internal Keras batch
+PREDICT_MAX_ROWS = 1_000_000
+PREDICT_BATCH_SIZE = 8192
+
+# Merge model calls from concurrent sessions arriving within this many milliseconds (0 = off)
+BATCH_WINDOW_MS = float(os.getenv("POPVIZ_BATCH_WINDOW_MS", "0"))
+
+# Windows encoded, predicted and suppressed per step of on_predict_streaming
+STREAM_CHUNK_WINDOWS = 50_000
+
+# Feature rows per predict_probs call in on_predict_sweep (organisms are grouped to fit)
+SWEEP_MAX_ROWS = PREDICT_MAX_ROWS
+
+# Row counts of the last predict_probs call; dedup_ratio = share of rows not sent to the model
+inference_metrics = {"rows": 0, "unique_rows": 0, "dedup_ratio": 0.0}
+
+def load_model():
+    # Prefer the TensorFlow-free NumPy export of nn_model.pkl when it is up to date
+    numpy_model = load_numpy_model()
+    if numpy_model is not None:
+        return numpy_model
+    import joblib
+    return joblib.load(model_path)
+
+def load_artifacts():
+    # The compiled bundle when it is up to date, otherwise the source files
+    bundle = load_bundle()
+    if bundle is not None:
+        loaded = artifacts_from_bundle(bundle)
+        if loaded is not None:
+            return loaded
+    return load_source_artifacts()
+
+def load_source_artifacts():
+    # joblib/scikit-learn/pandas are only needed here, on the loader thread
+    import joblib
+    import pandas as pd
+
+    with open(organism_encoder_path, "r") as f:
+        organism_encoder = json.load(f)
+
+    with open(subsequence_encoder_path, "r") as f:
+        subsequence_encoder = json.load(f)
+
+    scaler = joblib.load(scaler_path)
+    label_encoder = joblib.load(label_encoder_path)
+
+    prob_table = None
+    if INFERENCE_MODE == "table":
+        prob_table = load_probability_table()
+        if prob_table is None:
+            print("Probability table not available, falling back to the model")
+
+    # Scaled window lengths, indexed by raw length (only 3-7 are filled in)
+    scaled_lengths = np.zeros(MAX_WINDOW + 1)
+    scaled_lengths[MIN_WINDOW:] = scaler.transform(
+        pd.DataFrame({"length_sub_seq": range(MIN_WINDOW, MAX_WINDOW + 1)})
+    )[:, 0]
+
+    return SimpleNamespace(
+        organism_encoder=organism_encoder,
+        subsequence_index=KmerIndex(subsequence_encoder, MIN_WINDOW, MAX_WINDOW),
+        subsequence_values=np.unique(np.array(list(subsequence_encoder.values()), dtype=float)),
+        label_classes=label_encoder.classes_,
+        prob_table=prob_table,
+        model=load_model() if prob_table is None else None,
+        scaled_lengths=scaled_lengths,
+    )
+
+def artifacts_from_bundle(bundle):
+    # Same fields as load_source_artifacts, as views into the memory-mapped bundle.
+    # Returns None if the bundle lacks what INFERENCE_MODE needs.
+    meta, arrays = bundle.meta, bundle.arrays
+
+    prob_table = None
+    if INFERENCE_MODE == "table":
+        if meta["has_prob_table"]:
+            prob_table = ProbabilityTable(arrays["prob_table"], tuple(
+                arrays[f"prob_table_{name}"] for name in ("org_values", "subseq_values", "length_values")
+            ))
+        else:
+            print("Probability table not in the artifact bundle, falling back to the model")
+
+    model = None
+    if prob_table is None:
+        if meta["model"] is None:
+            return None
+        layers = []
+        for i, spec in enumerate(meta["model"]["layers"]):
+            layers.append((spec, [arrays[f"layer{i}_w{j}"] for j in range(spec["num_weights"])]))
+        model = NumpyModel(layers, meta["model"]["input_shape"])
+
+    kmer = meta["kmer"]
+    return SimpleNamespace(
+        organism_encoder=dict(zip(meta["organism_names"], arrays["organism_values"].tolist())),
+        subsequence_index=KmerIndex.from_arrays(
+            arrays["kmer_keys"], arrays["kmer_values"], arrays["kmer_digits"],
+            kmer["base"], kmer["min_len"], kmer["max_len"]
+        ),
+        subsequence_values=arrays["subsequence_values"],
+        label_classes=np.array(meta["label_classes"], dtype=object),
+        prob_table=prob_table,
+        model=model,
+        scaled_lengths=arrays["scaled_lengths"],
+    )
+
+def warm_up(artifacts):
+    # One tiny inference so the first real request does not pay for graph setup
+    X = np.array([[next(iter(artifacts.organism_encoder.values())), 0, artifacts.scaled_lengths[MIN_WINDOW]]])
+    if artifacts.prob_table is not None:
+        artifacts.prob_table.predict(X)
+    else:
+        artifacts.model.predict(X, verbose=0)
+
+# Artifacts load on first use, or in the background once registry.start() is called
+registry = ModelRegistry(load_artifacts, warm_up, watch_dir=model_dir)
+
+def artifacts():
+    return registry.get()
+
+def inference_engine():
+    # What actually produces probabilities for the loaded artifacts; results differ between them
+    a = artifacts()
+    if a.prob_table is not None:
+        return "table"
+    return "numpy" if isinstance(a.model, NumpyModel) else "keras"
+
+def model_version():
+    # Digest of the model files the loaded artifacts came from
+    artifacts()
+    return registry.version
+
+def __getattr__(name):
+    # prediction_algo.organism_encoder etc. still work, backed by the registry
+    if name in ("organism_encoder", "subsequence_index", "subsequence_values", "label_classes",
+                "prob_table", "model", "scaled_lengths"):
+        return getattr(artifacts(), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def feature_axes():
+    # Every value each feature column can take: (organism codes, subsequence codes, scaled lengths)
+    a = artifacts()
+    org_values = np.unique(np.array(list(a.organism_encoder.values()), dtype=float))
+    # Unseen subsequences are encoded as 0
+    subseq_values = np.unique(np.append(a.subsequence_values, 0))
+    length_values = a.scaled_lengths[MIN_WINDOW:]
+    return org_values, subseq_values, length_values
+
+def sliding_windows(sequence, min_len=MIN_WINDOW, max_len=MAX_WINDOW):
+    return SequenceWindows(sequence, min_len, max_len)
+
+def windows_in_range(sequence, first_start, stop_start, min_len=MIN_WINDOW, max_len=MAX_WINDOW):
+    # Same windows as sliding_windows, restricted to starts in [first_start, stop_start)
+    return SequenceWindows(sequence, min_len, max_len, first_start, stop_start)
 
 def iou(start1, end1, start2, end2):
     # Intersection-over-Union for 1D intervals
@@ -43,62 +192,216 @@ def iou(start1, end1, start2, end2):
     return inter / union
 
 def filter_overlapping(predictions, iou_threshold=0.2):
-    # Sort by confidence descending
-    predictions = sorted(predictions, key=lambda x: -x["confidence"])
-    
-    selected = []
-    
-    while predictions:
-        best = predictions.pop(0)
-        selected.append(best)
-        
-        new_predictions = []
-        for pred in predictions:
-            overlap = iou(best["start"], best["end"], pred["start"], pred["end"])
-            if overlap < iou_threshold:
-                new_predictions.append(pred)
-        
-        predictions = new_predictions
-    
-    return selected
+    starts = [pred["start"] for pred in predictions]
+    ends = [pred["end"] for pred in predictions]
+    confidences = [pred["confidence"] for pred in predictions]
+    keep = suppress_overlapping(starts, ends, confidences, iou_threshold)
+    return [predictions[i] for i in keep]
 
-def on_predict(organism_name, full_sequence):
-    full_sequence = full_sequence.strip()
+def build_features(org_encoded, windows):
+    # Builds the [org_encoded, subseq_encoded, length_scaled] matrix for all windows at once
+    a = artifacts()
+    X = np.empty((len(windows), 3))
+    X[:, 0] = org_encoded
+    # Unseen subsequences are encoded as 0
+    X[:, 1] = a.subsequence_index.codes(windows)
+    X[:, 2] = a.scaled_lengths[windows.lengths]
+    return X
 
-    org_encoded = organism_encoder.get(organism_name, None)
+def encode_organism(organism_name):
+    org_encoded = artifacts().organism_encoder.get(organism_name, None)
     if org_encoded is None:
         raise ValueError(f"Organism '{organism_name}' not found in encoder.")
+    return org_encoded
 
+def prepare_features(organism_name, full_sequence):
+    full_sequence = full_sequence.strip()
+    org_encoded = encode_organism(organism_name)
 
     windows = sliding_windows(full_sequence)
-    X = []
-    for start, end, subseq in windows:
-        subseq_encoded = subsequence_encoder.get(subseq, None)
-        if subseq_encoded is None:
-            subseq_encoded = 0  # or maybe better: skip or raise warning for unseen subsequences?
+    X = build_features(org_encoded, windows)
+    return windows, X
 
-        length_scaled = scaler.transform(pd.DataFrame({"length_sub_seq": [len(subseq)]}))[0][0]
-        X.append([org_encoded, subseq_encoded, length_scaled])
+def run_model(X, max_rows=PREDICT_MAX_ROWS):
+    # Runs the model once per distinct feature row, in as few calls as possible
+    # (one per max_rows rows), and scatters the results back to every row
+    model = artifacts().model
+    unique_X, inverse = np.unique(X, axis=0, return_inverse=True)
+    inverse = inverse.reshape(-1)
 
-    X = np.array(X)
+    inference_metrics["rows"] = len(X)
+    inference_metrics["unique_rows"] = len(unique_X)
+    inference_metrics["dedup_ratio"] = 1 - len(unique_X) / len(X)
+    print(f"Prediction algo dedup: {len(X)} rows -> {len(unique_X)} unique ({inference_metrics['dedup_ratio']:.1%} saved)")
 
-    probs = model.predict(X, verbose=0)
-    pred_labels = np.argmax(probs, axis=1)
-    confidences = np.max(probs, axis=1)
+    probs = []
+    for i in range(0, len(unique_X), max_rows):
+        probs.append(model.predict(unique_X[i:i + max_rows], batch_size=PREDICT_BATCH_SIZE, verbose=0))
+    return np.concatenate(probs)[inverse]
 
-    decoded_labels = label_encoder.inverse_transform(pred_labels)
+# Shared inference actor for web mode; every session's model calls go through it
+batcher = MicroBatcher(run_model, BATCH_WINDOW_MS, PREDICT_MAX_ROWS) if BATCH_WINDOW_MS > 0 else None
 
-    predictions = []
-    for (start, end, _), label, confidence in zip(windows, decoded_labels, confidences):
-        predictions.append({
+def predict_probs(X, max_rows=PREDICT_MAX_ROWS):
+    a = artifacts()
+    if len(X) == 0:
+        return np.empty((0, len(a.label_classes)), dtype=np.float32)
+
+    if a.prob_table is not None:
+        return a.prob_table.predict(X)
+
+    if batcher is not None:
+        return batcher.predict(X)
+
+    return run_model(X, max_rows)
+
+def build_predictions(starts, ends, label_indices, confidences):
+    # Final prediction dicts, in the given order, from kept windows' arrays
+    decoded_labels = artifacts().label_classes[np.asarray(label_indices, dtype=np.intp)]
+
+    final_predictions = []
+    for start, end, label, confidence in zip(np.asarray(starts).tolist(), np.asarray(ends).tolist(),
+                                             decoded_labels, confidences):
+        final_predictions.append({
             "start": start,
             "end": end,
             "label": label,
             "confidence": confidence
         })
+    return final_predictions
+
+def select_predictions(windows, probs):
+    pred_labels = np.argmax(probs, axis=1)
+    confidences = np.max(probs, axis=1)
+
+    keep = suppress_overlapping(windows.starts, windows.ends, confidences)
+    return build_predictions(windows.starts[keep], windows.ends[keep], pred_labels[keep], confidences[keep])
 
-    final_predictions = filter_overlapping(predictions)
+def needs_streaming(full_sequence):
+    # More windows than one streaming chunk
+    return len(full_sequence.strip()) * (MAX_WINDOW - MIN_WINDOW + 1) > STREAM_CHUNK_WINDOWS
+
+def on_predict(organism_name, full_sequence):
+    # Long sequences go through the bounded-memory path, which gives the same result
+    if needs_streaming(full_sequence):
+        return on_predict_streaming(organism_name, full_sequence)
+
+    windows, X = prepare_features(organism_name, full_sequence)
+
+    probs = predict_probs(X)
+    final_predictions = select_predictions(windows, probs)
     
     print(f"Prediction algo final predictions: {final_predictions}")
 
     return final_predictions
+
+def on_predict_many(jobs, max_rows=PREDICT_MAX_ROWS):
+    # jobs: iterable of (organism_name, full_sequence) pairs.
+    # All windows are stacked into one feature matrix so the model is called
+    # once per max_rows rows instead of once per sequence.
+    prepared = [prepare_features(organism_name, full_sequence) for organism_name, full_sequence in jobs]
+    if not prepared:
+        return []
+
+    X = np.concatenate([X for _, X in prepared])
+    probs = predict_probs(X, max_rows)
+
+    results = []
+    offset = 0
+    for windows, _ in prepared:
+        results.append(select_predictions(windows, probs[offset:offset + len(windows)]))
+        offset += len(windows)
+
+    print(f"Prediction algo batch: {len(results)} sequences, {len(X)} windows")
+
+    return results
+
+def on_predict_batch(jobs):
+    # Like on_predict_many, but sequences too long for one batch take the streaming path
+    jobs = list(jobs)
+    short = [i for i, (_, full_sequence) in enumerate(jobs) if not needs_streaming(full_sequence)]
+    results = [None] * len(jobs)
+    for i, predictions in zip(short, on_predict_many([jobs[i] for i in short])):
+        results[i] = predictions
+    for i, (organism_name, full_sequence) in enumerate(jobs):
+        if results[i] is None:
+            results[i] = on_predict_streaming(organism_name, full_sequence)
+    return results
+
+def on_predict_sweep(full_sequence, organism_names=None, max_rows=SWEEP_MAX_ROWS):
+    # Predicts one sequence for many organisms (default: every organism in the
+    # encoder). The window features are built once and only the organism column
+    # changes, so all organisms go through one batched model call (more if the
+    # rows exceed max_rows). Organisms sharing an encoded value share a result.
+    a = artifacts()
+    full_sequence = full_sequence.strip()
+    if organism_names is None:
+        organism_names = list(a.organism_encoder)
+    organism_names = list(organism_names)
+    if not organism_names:
+        raise ValueError("No organisms to sweep.")
+    org_codes = np.array([encode_organism(name) for name in organism_names], dtype=float)
+    distinct_codes, code_of_organism = np.unique(org_codes, return_inverse=True)
+
+    windows, X = prepare_features(organism_names[0], full_sequence)
+    n = len(full_sequence)
+    codes_per_call = max(1, max_rows // max(len(X), 1))
+
+    # (distinct code, residue) label codes, filled one model call at a time
+    code_labels = np.full((len(distinct_codes), n), COIL, dtype=np.uint8)
+    for first in range(0, len(distinct_codes) if len(X) else 0, codes_per_call):
+        group = distinct_codes[first:first + codes_per_call]
+        # Window features repeated per organism code, organism column broadcast
+        X_sweep = np.empty((len(group), len(X), 3))
+        X_sweep[:, :, 0] = group[:, None]
+        X_sweep[:, :, 1:] = X[None, :, 1:]
+        probs = predict_probs(X_sweep.reshape(-1, 3), max_rows).reshape(len(group), len(X), -1)
+        for i, group_probs in enumerate(probs):
+            code_labels[first + i] = paint_labels(select_predictions(windows, group_probs), n)
+
+    labels = code_labels[code_of_organism]
+
+    # Per residue: how many organisms predict H/E/C, the majority label, and whether they disagree
+    counts = np.stack([(labels == code).sum(axis=0) for code in range(len(HEC))], axis=1)
+    consensus = counts.argmax(axis=1).astype(np.uint8)
+    changed = np.flatnonzero(counts.max(axis=1) < len(organism_names))
+
+    print(f"Prediction algo sweep: {len(organism_names)} organisms ({len(distinct_codes)} distinct codes), "
+          f"{len(changed)} of {n} residues change")
+
+    return {
+        "organisms": organism_names,
+        "profiles": {name: labels_to_string(labels[i]) for i, name in enumerate(organism_names)},
+        "labels": labels,
+        "consensus": labels_to_string(consensus),
+        "counts": counts,
+        "changed_positions": changed.tolist(),
+    }
+
+def on_predict_streaming(organism_name, full_sequence, chunk_windows=STREAM_CHUNK_WINDOWS, on_chunk=None):
+    # Same result as on_predict, but only about chunk_windows windows (plus the few
+    # still undecided at chunk boundaries) are held in memory at any time.
+    # on_chunk(done, total) is called after each chunk with residue positions.
+    full_sequence = full_sequence.strip()
+    org_encoded = encode_organism(organism_name)
+
+    n = len(full_sequence)
+    chunk_positions = max(1, chunk_windows // (MAX_WINDOW - MIN_WINDOW + 1))
+    suppressor = StreamingSuppressor(MAX_WINDOW)
+
+    for first_start in range(0, n, chunk_positions):
+        stop_start = min(first_start + chunk_positions, n)
+        windows = windows_in_range(full_sequence, first_start, stop_start)
+        X = build_features(org_encoded, windows)
+        probs = predict_probs(X)
+
+        suppressor.push(windows.starts, windows.ends, np.max(probs, axis=1), np.argmax(probs, axis=1), frontier=stop_start)
+        if on_chunk:
+            on_chunk(stop_start, n)
+
+    starts, ends, confidences, pred_labels = suppressor.finish()
+    final_predictions = build_predictions(starts, ends, pred_labels, confidences)
+
+    print(f"Prediction algo streaming: {n} residues, {len(final_predictions)} final predictions")
+
+    return final_predictions
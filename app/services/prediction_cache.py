@@ -0,0 +1,118 @@
+# app/services/prediction_cache.py
+# Content-addressed cache of final predictions, keyed by (organism, sequence,
+# model artifact version, inference engine). Entries live in an in-memory LRU and on disk under
+# CACHE_DIR, one folder per key:
+#     <key>/predictions.json
+# Charts are cached separately by chart_cache, keyed by the predicted structure.
+import hashlib
+import json
+import os
+import shutil
+import threading
+from collections import OrderedDict
+
+CACHE_DIR = os.path.join("app", "data", "prediction_cache")
+MAX_MEMORY_ENTRIES = 128
+MAX_DISK_BYTES = 200 * 1024 * 1024
+
+def normalize_sequence(full_sequence):
+    # Same normalization on_predict applies before windowing
+    return full_sequence.strip()
+
+class PredictionCache:
+    def __init__(self, cache_dir=CACHE_DIR, max_memory_entries=MAX_MEMORY_ENTRIES, max_disk_bytes=MAX_DISK_BYTES):
+        self.cache_dir = cache_dir
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_bytes = max_disk_bytes
+        self.memory = OrderedDict()
+        self.lock = threading.Lock()
+
+    def key(self, organism_name, full_sequence):
+        # The inference engine is part of the key: table mode's float16 probabilities break ties differently.
+        # The version is that of the loaded artifacts, so files changed on disk only count once they are reloaded.
+        from services.prediction_algo import inference_engine, model_version
+        payload = json.dumps([organism_name, normalize_sequence(full_sequence), model_version(), inference_engine()])
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def get(self, organism_name, full_sequence):
+        # Returns {"predictions": [...]} or None
+        key = self.key(organism_name, full_sequence)
+        entry_dir = os.path.join(self.cache_dir, key)
+
+        with self.lock:
+            entry = self.memory.get(key)
+            if entry is not None:
+                self.memory.move_to_end(key)
+
+        if entry is None:
+            entry_path = os.path.join(entry_dir, "predictions.json")
+            if not os.path.exists(entry_path):
+                return None
+            try:
+                with open(entry_path, "r") as f:
+                    entry = {"predictions": json.load(f)["predictions"]}
+            except (OSError, ValueError, KeyError):
+                return None
+
+        # Touch the entry so disk eviction is least-recently-used
+        try:
+            os.utime(os.path.join(entry_dir, "predictions.json"))
+        except OSError:
+            # Another process evicted the folder
+            with self.lock:
+                self.memory.pop(key, None)
+            return None
+        self._remember(key, entry)
+        return entry
+
+    def put(self, organism_name, full_sequence, predictions):
+        key = self.key(organism_name, full_sequence)
+        entry_dir = os.path.join(self.cache_dir, key)
+        os.makedirs(entry_dir, exist_ok=True)
+
+        predictions = [{
+            "start": int(pred["start"]),
+            "end": int(pred["end"]),
+            "label": str(pred["label"]),
+            "confidence": float(pred["confidence"])
+        } for pred in predictions]
+
+        with open(os.path.join(entry_dir, "predictions.json"), "w") as f:
+            json.dump({"predictions": predictions}, f)
+
+        self._remember(key, {"predictions": predictions})
+        self.evict()
+
+    def _remember(self, key, entry):
+        with self.lock:
+            self.memory[key] = entry
+            self.memory.move_to_end(key)
+            while len(self.memory) > self.max_memory_entries:
+                self.memory.popitem(last=False)
+
+    def evict(self):
+        # Drops least-recently-used entry folders until the cache fits in max_disk_bytes
+        if not os.path.isdir(self.cache_dir):
+            return
+
+        entries = []
+        total = 0
+        for key in os.listdir(self.cache_dir):
+            entry_dir = os.path.join(self.cache_dir, key)
+            if not os.path.isdir(entry_dir):
+                continue
+            size = sum(os.path.getsize(os.path.join(entry_dir, name)) for name in os.listdir(entry_dir))
+            entry_path = os.path.join(entry_dir, "predictions.json")
+            last_used = os.path.getmtime(entry_path) if os.path.exists(entry_path) else 0
+            entries.append((last_used, key, size))
+            total += size
+
+        for _, key, size in sorted(entries):
+            if total <= self.max_disk_bytes:
+                break
+            shutil.rmtree(os.path.join(self.cache_dir, key), ignore_errors=True)
+            with self.lock:
+                self.memory.pop(key, None)
+            total -= size
+
+prediction_cache = PredictionCache()
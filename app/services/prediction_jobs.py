@@ -0,0 +1,40 @@
+# app/services/prediction_jobs.py
+# Background execution for prediction jobs started from the UI, so event
+# handlers return immediately and a slow job never blocks a session.
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# With micro-batching on (POPVIZ_BATCH_WINDOW_MS), model calls only merge when
+# several sessions' jobs are running at once, so allow many more of them
+BATCHING = float(os.getenv("POPVIZ_BATCH_WINDOW_MS", "0")) > 0
+PREDICTION_WORKERS = int(os.getenv("POPVIZ_PREDICTION_WORKERS", "16" if BATCHING else "2"))
+
+executor = ThreadPoolExecutor(max_workers=PREDICTION_WORKERS, thread_name_prefix="prediction")
+
+class PredictionCancelled(Exception):
+    pass
+
+class PredictionJob:
+    def __init__(self, on_progress=None):
+        # on_progress(stage, fraction) is called from the worker thread
+        self.on_progress = on_progress
+        self.cancel_event = threading.Event()
+        self.future = None
+
+    def submit(self, fn, *args):
+        self.future = executor.submit(fn, *args)
+        return self.future
+
+    def cancel(self):
+        # Takes effect at the job's next check_cancelled()
+        self.cancel_event.set()
+
+    def check_cancelled(self):
+        if self.cancel_event.is_set():
+            raise PredictionCancelled()
+
+    def report(self, stage, fraction):
+        self.check_cancelled()
+        if self.on_progress:
+            self.on_progress(stage, fraction)
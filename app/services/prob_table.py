@@ -0,0 +1,98 @@
+# app/services/prob_table.py
+# Precomputed class probabilities for every (organism code, subsequence code,
+# scaled length) the encoders can produce. With the table loaded, inference
+# is an index gather into a memory-mapped float16 array, no network involved.
+#
+# Build (run from the POPViz directory after changing anything in ML/predictor):
+#     python app/services/prob_table.py
+import numpy as np
+import os
+import sys
+
+if __name__ == "__main__":
+    # Run as a build script: make the services package importable
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from services.numpy_model import files_sha256
+
+table_path = "ML/predictor/prob_table.npy"
+table_axes_path = "ML/predictor/prob_table_axes.npz"
+
+# Artifacts the table is derived from
+source_paths = [
+    "ML/predictor/Organism_encodemap.json",
+    "ML/predictor/subsequence_encodemap.json",
+    "ML/predictor/scaler.pkl",
+    "ML/predictor/nn_model.pkl",
+]
+
+BUILD_CHUNK_ROWS = 200_000
+
+def sources_sha256(paths=source_paths):
+    return files_sha256(paths)
+
+class ProbabilityTable:
+    def __init__(self, table, axes):
+        # table: (len(axes[0]), len(axes[1]), len(axes[2]), num_classes)
+        # axes: sorted distinct values of each feature column
+        self.table = table
+        self.axes = axes
+
+    def indices(self, X):
+        idx = []
+        for column, axis in enumerate(self.axes):
+            values = X[:, column]
+            i = np.searchsorted(axis, values).clip(0, len(axis) - 1)
+            if not np.array_equal(axis[i], values):
+                raise ValueError(f"Feature column {column} has values outside the probability table.")
+            idx.append(i)
+        return tuple(idx)
+
+    def predict(self, X, batch_size=None, verbose=0):
+        X = np.asarray(X)
+        return self.table[self.indices(X)].astype(np.float32)
+
+def build_probability_table(model, axes, output_path=table_path, axes_path=table_axes_path):
+    org_values, subseq_values, length_values = axes
+    grid = np.stack(np.meshgrid(org_values, subseq_values, length_values, indexing="ij"), axis=-1).reshape(-1, 3)
+
+    probs = []
+    for i in range(0, len(grid), BUILD_CHUNK_ROWS):
+        probs.append(model.predict(grid[i:i + BUILD_CHUNK_ROWS], verbose=0))
+    probs = np.concatenate(probs)
+
+    table = np.lib.format.open_memmap(
+        output_path, mode="w+", dtype=np.float16,
+        shape=(len(org_values), len(subseq_values), len(length_values), probs.shape[1])
+    )
+    table[:] = probs.reshape(table.shape)
+    table.flush()
+    del table
+
+    np.savez(
+        axes_path,
+        org_values=org_values,
+        subseq_values=subseq_values,
+        length_values=length_values,
+        source_sha256=np.array(sources_sha256()),
+    )
+    return output_path
+
+def load_probability_table(path=table_path, axes_path=table_axes_path):
+    # Returns None when the table is missing or was built from different artifacts
+    if not (os.path.exists(path) and os.path.exists(axes_path)):
+        return None
+
+    with np.load(axes_path) as data:
+        if str(data["source_sha256"]) != sources_sha256():
+            print(f"Ignoring stale probability table: {path}")
+            return None
+        axes = (data["org_values"], data["subseq_values"], data["length_values"])
+
+    return ProbabilityTable(np.load(path, mmap_mode="r"), axes)
+
+if __name__ == "__main__":
+    from services import prediction_algo
+
+    build_probability_table(prediction_algo.load_model(), prediction_algo.feature_axes())
+    table = load_probability_table()
+    print(f"Built {table_path} with shape {table.table.shape}")
@@ -1,9 +1,19 @@
 # app/services/result_utils.py
 
-from fpdf import FPDF
+import io
 import os
 
-def generate_pdf(sequence, insights, prediction_uuid, output_path=None):
+def generate_pdf(sequence, insights, prediction_uuid, output_path=None, assets_folder=os.path.join("app", "assets"), charts=None):
+    from fpdf import FPDF
+    # charts: {chart file name: PNG bytes}, embedded straight from memory;
+    # defaults to the files under <assets_folder>/<uuid>/ that exist
+    if charts is None:
+        charts = {}
+        for name in ["structure.png", "pie_chart.png", "bar_chart.png"]:
+            path = os.path.join(assets_folder, prediction_uuid, name)
+            if os.path.exists(path):
+                with open(path, "rb") as f:
+                    charts[name] = f.read()
     pdf = FPDF()
     pdf.set_auto_page_break(auto=True, margin=15)
     pdf.add_page()
@@ -27,31 +37,28 @@ def generate_pdf(sequence, insights, prediction_uuid, output_path=None):
     pdf.cell(0, 10, "Insights:", ln=True)
     pdf.set_font("Arial", "", 12)
     for insight in insights:
-        pdf.multi_cell(0, 8, f"- {insight}")
+        pdf.multi_cell(0, 8, f"- {insight}", new_x="LMARGIN", new_y="NEXT")
     pdf.ln(10)
 
     # Structure Image
     pdf.set_font("Arial", "B", 14)
     pdf.cell(0, 10, "Structure Image", ln=True)
-    structure_path = os.path.join("app", "assets", f"{prediction_uuid}", f"structure.png")
-    if os.path.exists(structure_path):
-        pdf.image(structure_path, w=150)
+    if "structure.png" in charts:
+        pdf.image(io.BytesIO(charts["structure.png"]), w=150)
         pdf.ln(10)
 
     # Pie Chart
     pdf.set_font("Arial", "B", 14)
     pdf.cell(0, 10, "Predicted Protein Structure Distribution", ln=True)
-    pie_chart_path = os.path.join("app", "assets", f"{prediction_uuid}", f"pie_chart.png")
-    if os.path.exists(pie_chart_path):
-        pdf.image(pie_chart_path, w=100)
+    if "pie_chart.png" in charts:
+        pdf.image(io.BytesIO(charts["pie_chart.png"]), w=100)
         pdf.ln(10)
 
     # Bar Chart
     pdf.set_font("Arial", "B", 14)
     pdf.cell(0, 10, "Comparison with Known Protein Data", ln=True)
-    bar_chart_path = os.path.join("app", "assets", f"{prediction_uuid}", f"bar_chart.png")
-    if os.path.exists(bar_chart_path):
-        pdf.image(bar_chart_path, w=120)
+    if "bar_chart.png" in charts:
+        pdf.image(io.BytesIO(charts["bar_chart.png"]), w=120)
 
     # Save to file
     if not output_path:
@@ -72,20 +79,20 @@ def color_sequence(sequence):
         colored_sequence.append((char, color))
     return colored_sequence
 
-def generate_insights(sequence):
-    from collections import Counter
-    counts = Counter(sequence)
+def generate_insights(sequence, labels=None):
+    from services.structure_labels import string_to_labels, label_counts
     total = len(sequence)
     if total == 0:
         return ["No sequence data available."]
 
+    helix, strand, coil = label_counts(string_to_labels(sequence) if labels is None else labels)
     insights = []
 
-    if counts.get('H', 0) / total > 0.4:
+    if helix / total > 0.4:
         insights.append("High proportion of helices suggests structural stability.")
-    if counts.get('E', 0) / total > 0.3:
+    if strand / total > 0.3:
         insights.append("Significant amount of sheets indicates possible stable interactions.")
-    if counts.get('C', 0) / total > 0.3:
+    if coil / total > 0.3:
         insights.append("Coil regions indicate flexibility in the protein structure.")
 
     if not insights:
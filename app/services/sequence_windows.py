@@ -0,0 +1,44 @@
+# app/services/sequence_windows.py
+# All sliding windows of a sequence without a Python string or tuple per
+# window: the residues the windows cover are converted to a uint8 array once,
+# and starts/ends/lengths are flat arrays in the usual order (length, then
+# start).
+import numpy as np
+
+def residue_codes(sequence):
+    # One uint8 per character (as str indexing counts them); non-ASCII characters become 0
+    codepoints = np.frombuffer(sequence.encode("utf-32-le"), dtype=np.uint32)
+    return np.where(codepoints < 128, codepoints, 0).astype(np.uint8)
+
+class SequenceWindows:
+    def __init__(self, sequence, min_len, max_len, first_start=0, stop_start=None):
+        # Windows of min_len..max_len residues starting in [first_start, stop_start)
+        self.sequence = sequence
+        self.length = len(sequence)
+        self.min_len = min_len
+        self.max_len = max_len
+        self.first_start = first_start
+        self.stop_start = self.length if stop_start is None else min(stop_start, self.length)
+        # Codes of the residues from first_start on that some window covers; a streamed
+        # chunk encodes its own slice, not the whole sequence
+        self.residues = residue_codes(sequence[first_start:self.stop_start + max_len - 1])
+
+        self.counts = np.array([self.count(length) for length in range(min_len, max_len + 1)], dtype=np.int64)
+        self.lengths = np.repeat(np.arange(min_len, max_len + 1), self.counts)
+        # Start offsets within each length's block
+        block_offsets = np.repeat(np.cumsum(self.counts) - self.counts, self.counts)
+        self.starts = np.arange(len(self.lengths), dtype=np.int64) - block_offsets + first_start
+        self.ends = self.starts + self.lengths
+
+    def count(self, length):
+        # Number of windows of this length
+        return max(0, min(self.stop_start, self.length - length + 1) - self.first_start)
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __getitem__(self, i):
+        # (start, end, subsequence) of window i, like the old tuple list
+        start = int(self.starts[i])
+        end = int(self.ends[i])
+        return start, end, self.sequence[start:end]
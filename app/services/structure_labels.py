@@ -0,0 +1,55 @@
+# app/services/structure_labels.py
+# Per-residue secondary structure as a compact uint8 array (0 = H, 1 = E, 2 = C),
+# painted from the selected predictions in one pass and shared by the UI,
+# charts and PDF alongside the H/E/C string.
+import numpy as np
+
+HELIX, STRAND, COIL = 0, 1, 2
+HEC = np.frombuffer(b"HEC", dtype=np.uint8)
+
+# Model label -> code; anything else paints as coil
+LABEL_CODES = {"helix": HELIX, "strand": STRAND, "turn": COIL}
+
+# Character -> code; anything but H and E reads as coil
+CHAR_CODES = np.full(256, COIL, dtype=np.uint8)
+CHAR_CODES[ord("H")] = HELIX
+CHAR_CODES[ord("E")] = STRAND
+
+def paint_labels(predictions, length):
+    # Codes for `length` residues, coil where no prediction covers them. Where
+    # predictions overlap the later one wins, as when painting them in order.
+    labels = np.full(length, COIL, dtype=np.uint8)
+    if not predictions or length == 0:
+        return labels
+
+    starts = np.clip(np.fromiter((pred["start"] for pred in predictions), dtype=np.int64, count=len(predictions)), 0, length)
+    ends = np.clip(np.fromiter((pred["end"] for pred in predictions), dtype=np.int64, count=len(predictions)), 0, length)
+    codes = np.fromiter((LABEL_CODES.get(str(pred["label"]).lower(), COIL) for pred in predictions),
+                        dtype=np.uint8, count=len(predictions))
+    sizes = np.maximum(ends - starts, 0)
+
+    # Every covered residue position, tagged with the index of the prediction covering it
+    owner_of_slot = np.repeat(np.arange(len(predictions)), sizes)
+    positions = np.repeat(starts - np.cumsum(sizes) + sizes, sizes) + np.arange(sizes.sum())
+
+    # Last covering prediction per residue
+    owner = np.full(length, -1, dtype=np.int64)
+    np.maximum.at(owner, positions, owner_of_slot)
+    covered = owner >= 0
+    labels[covered] = codes[owner[covered]]
+    return labels
+
+def labels_to_string(labels):
+    return HEC[labels].tobytes().decode("ascii")
+
+def string_to_labels(sequence):
+    return CHAR_CODES[np.frombuffer((sequence or "").encode("ascii", "replace"), dtype=np.uint8)]
+
+def label_counts(labels):
+    # (H, E, C) residue counts
+    return np.bincount(labels, minlength=3)[:3]
+
+def paint_predictions(predictions, length):
+    # Returns (H/E/C string, uint8 label array) for a sequence of `length` residues
+    labels = paint_labels(predictions, length)
+    return labels_to_string(labels), labels
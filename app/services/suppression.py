@@ -0,0 +1,118 @@
+import numpy as np
+
+def overlaps_kept(start, end, buckets, other_starts, iou_threshold):
+    # True if a window in buckets (start -> ends of kept windows) starting at one of
+    # other_starts has IoU >= iou_threshold with [start, end)
+    for other_start in other_starts:
+        for other_end in buckets.get(other_start, ()):
+            inter = min(end, other_end) - max(start, other_start)
+            if inter <= 0:
+                continue
+            union = (end - start) + (other_end - other_start) - inter
+            if inter / union >= iou_threshold:
+                return True
+    return False
+
+def suppress_overlapping(starts, ends, confidences, iou_threshold=0.2):
+    # Greedy 1D NMS over window arrays, same selection as filter_overlapping.
+    # Returns the indices of the kept windows, highest confidence first.
+    # A window is kept iff no window kept before it has IoU >= iou_threshold
+    # with it. Windows are short, so only kept windows starting within
+    # max_len positions can overlap; those are found via per-start buckets.
+    starts = np.asarray(starts, dtype=np.int64)
+    ends = np.asarray(ends, dtype=np.int64)
+    confidences = np.asarray(confidences)
+
+    if len(starts) == 0:
+        return np.empty(0, dtype=np.intp)
+
+    # Stable, so ties keep window order just like sorted(key=-confidence)
+    order = np.argsort(-confidences, kind="stable")
+
+    if iou_threshold <= 0:
+        # Every pair has IoU >= 0, so the best window suppresses all others
+        return order[:1]
+
+    max_len = int((ends - starts).max())
+    buckets = {}
+    kept = []
+
+    starts_list = starts.tolist()
+    ends_list = ends.tolist()
+
+    for idx in order.tolist():
+        start = starts_list[idx]
+        end = ends_list[idx]
+        if not overlaps_kept(start, end, buckets, range(start - max_len + 1, end), iou_threshold):
+            kept.append(idx)
+            buckets.setdefault(start, []).append(end)
+
+    return np.array(kept, dtype=np.intp)
+
+class StreamingSuppressor:
+    # Same selection as suppress_overlapping, fed window chunks in position order.
+    # A window is decided once every window that could overlap it has been pushed
+    # and every higher-confidence overlapping window is decided; until then it
+    # stays pending. Only windows near the frontier are held between pushes.
+    def __init__(self, max_len, iou_threshold=0.2):
+        if iou_threshold <= 0:
+            raise ValueError("Streaming suppression needs a positive iou_threshold.")
+        self.max_len = max_len
+        self.iou_threshold = iou_threshold
+        self.kept_buckets = {}  # start -> ends of kept windows near the frontier
+        self.pending = None
+        self.kept = []
+
+    def push(self, starts, ends, confidences, payload, frontier):
+        # frontier: every window starting before it has now been pushed.
+        # payload is carried along with each window (e.g. its label index).
+        arrays = [np.asarray(starts, dtype=np.int64), np.asarray(ends, dtype=np.int64),
+                  np.asarray(confidences), np.asarray(payload)]
+        if self.pending is not None:
+            arrays = [np.concatenate([old, new]) for old, new in zip(self.pending, arrays)]
+        starts, ends, confidences, payload = arrays
+
+        # Confidence descending, ties in sliding_windows order (length, then start)
+        order = np.lexsort((starts, ends - starts, -confidences))
+        starts_list = starts.tolist()
+        ends_list = ends.tolist()
+
+        pending_buckets = {}
+        pending_idx = []
+        kept_idx = []
+        for idx in order.tolist():
+            start = starts_list[idx]
+            end = ends_list[idx]
+            other_starts = range(start - self.max_len + 1, end)
+
+            if overlaps_kept(start, end, self.kept_buckets, other_starts, self.iou_threshold):
+                continue
+
+            # Undecided while an overlapping window is unseen or still pending
+            if end > frontier or overlaps_kept(start, end, pending_buckets, other_starts, self.iou_threshold):
+                pending_buckets.setdefault(start, []).append(end)
+                pending_idx.append(idx)
+            else:
+                self.kept_buckets.setdefault(start, []).append(end)
+                kept_idx.append(idx)
+
+        kept_idx = np.array(kept_idx, dtype=np.intp)
+        self.kept.append([a[kept_idx] for a in arrays])
+        pending_idx = np.array(pending_idx, dtype=np.intp)
+        self.pending = [a[pending_idx] for a in arrays]
+
+        # Later windows start at or after the earliest pending one (or the frontier)
+        lowest_start = min(int(self.pending[0].min()), frontier) if len(pending_idx) else frontier
+        for start in [s for s in self.kept_buckets if s <= lowest_start - self.max_len]:
+            del self.kept_buckets[start]
+
+    def finish(self):
+        # Returns (starts, ends, confidences, payload) of kept windows, highest confidence first
+        if self.pending is not None and len(self.pending[0]):
+            raise ValueError("Windows are still pending; push the final chunk with frontier at the sequence end.")
+        if not self.kept:
+            return (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0), np.empty(0))
+
+        starts, ends, confidences, payload = [np.concatenate(parts) for parts in zip(*self.kept)]
+        order = np.lexsort((starts, ends - starts, -confidences))
+        return starts[order], ends[order], confidences[order], payload[order]
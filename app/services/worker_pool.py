@@ -0,0 +1,74 @@
+# app/services/worker_pool.py
+# Process-pool execution of prediction jobs. The encoders, scaler and model are
+# loaded once in the parent (by importing prediction_algo) and the workers are
+# forked from it, so they share those read-only pages copy-on-write instead of
+# each loading their own copy.
+import gc
+import multiprocessing
+import os
+
+from services import prediction_algo
+
+# Bins per worker; more bins even out the load at the cost of more dispatches
+BINS_PER_WORKER = 4
+
+def create_pool(workers):
+    # Forked workers inherit the already-loaded artifacts. gc.freeze() keeps the
+    # collector from touching (and so copying) the parent's objects in each child.
+    if "fork" in multiprocessing.get_all_start_methods():
+        prediction_algo.artifacts()
+        gc.collect()
+        gc.freeze()
+        pool = multiprocessing.get_context("fork").Pool(workers)
+        gc.unfreeze()
+        return pool
+    # No fork (Windows): every worker imports prediction_algo and loads its own copy,
+    # though workers that load the memory-mapped artifact bundle still share its pages
+    return multiprocessing.Pool(workers)
+
+def window_count(sequence):
+    length = len(sequence.strip())
+    return sum(max(0, length - size + 1) for size in range(prediction_algo.MIN_WINDOW, prediction_algo.MAX_WINDOW + 1))
+
+def balance_jobs(jobs, num_bins):
+    # Longest-first greedy packing of (organism, sequence) jobs into bins of
+    # similar total window count. Returns lists of (job index, organism, sequence),
+    # heaviest bin first.
+    bins = [[] for _ in range(num_bins)]
+    loads = [0] * num_bins
+    order = sorted(range(len(jobs)), key=lambda i: -window_count(jobs[i][1]))
+    for i in order:
+        lightest = loads.index(min(loads))
+        bins[lightest].append((i, jobs[i][0], jobs[i][1]))
+        loads[lightest] += window_count(jobs[i][1])
+    return [b for _, b in sorted(zip(loads, bins), key=lambda item: -item[0]) if b]
+
+def predict_bin(job_bin):
+    # Runs in a worker: one batched prediction call for the bin's short sequences
+    predictions = prediction_algo.on_predict_batch([(organism_name, sequence) for _, organism_name, sequence in job_bin])
+    return [(i, preds) for (i, _, _), preds in zip(job_bin, predictions)]
+
+class PredictionPool:
+    def __init__(self, workers=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.pool = create_pool(self.workers)
+
+    def predict_many(self, jobs):
+        # Same result as prediction_algo.on_predict_many(jobs), spread over the workers
+        jobs = list(jobs)
+        results = [None] * len(jobs)
+        bins = balance_jobs(jobs, min(len(jobs), self.workers * BINS_PER_WORKER)) if jobs else []
+        for bin_results in self.pool.imap_unordered(predict_bin, bins):
+            for i, predictions in bin_results:
+                results[i] = predictions
+        return results
+
+    def close(self):
+        self.pool.close()
+        self.pool.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,102 @@
+# benchmarks/artifact_loading.py
+# Cold start and per-process memory of the source loaders (JSON + joblib +
+# NumPy export) against the compiled artifact bundle. Each loader is run in N
+# fresh processes at once, like N spawned workers; memory is read while all
+# of them are alive, so shared pages are split between them in PSS.
+#
+# Run from the POPViz directory (Linux, for /proc/self/smaps_rollup):
+#     python app/services/artifact_bundle.py
+#     python benchmarks/artifact_loading.py --workers 4
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app")
+LOADERS = ["sources", "bundle"]
+
+def memory_kb():
+    # {"rss": ..., "pss": ..., "uss": ...} in kB for this process
+    usage = {}
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            for line in f:
+                name, _, value = line.partition(":")
+                if name in ("Rss", "Pss", "Private_Clean", "Private_Dirty"):
+                    usage[name] = int(value.split()[0])
+    except OSError:
+        import resource
+        return {"rss": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, "pss": None, "uss": None}
+    return {"rss": usage["Rss"], "pss": usage["Pss"], "uss": usage["Private_Clean"] + usage["Private_Dirty"]}
+
+def child(loader):
+    # Loads the artifacts one way, runs a prediction, then waits for the parent before measuring
+    started = time.perf_counter()
+    sys.path.insert(0, APP_DIR)
+    from services import prediction_algo
+    from services.artifact_bundle import load_bundle
+
+    if loader == "bundle":
+        bundle = load_bundle()
+        if bundle is None:
+            sys.exit("No up-to-date bundle; run python app/services/artifact_bundle.py first")
+        artifacts = prediction_algo.artifacts_from_bundle(bundle)
+    else:
+        artifacts = prediction_algo.load_source_artifacts()
+    prediction_algo.warm_up(artifacts)
+    loaded = time.perf_counter() - started
+
+    # Serve a request through the module's normal path with these artifacts
+    prediction_algo.registry.artifacts = artifacts
+    sequence = "MKTAYIAKQRQISFVKSHFSRQLEERLGLIEVQAPILSRVGDGTQDNLSGAEKAVQVKVKALPDAQFEVVHSLAKWKRQTLGQHDF" * 4
+    with open(os.devnull, "w") as devnull:
+        stdout, sys.stdout = sys.stdout, devnull
+        prediction_algo.on_predict(next(iter(artifacts.organism_encoder)), sequence)
+        sys.stdout = stdout
+
+    print(json.dumps({"load_seconds": loaded}), flush=True)
+    sys.stdin.readline()
+    print(json.dumps(memory_kb()), flush=True)
+
+def run(loader, workers):
+    processes = [
+        subprocess.Popen([sys.executable, __file__, "--child", loader],
+                         stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+        for _ in range(workers)
+    ]
+    loads = [json.loads(p.stdout.readline())["load_seconds"] for p in processes]
+    # Everyone is loaded and alive: measure now
+    for p in processes:
+        p.stdin.write("\n")
+        p.stdin.flush()
+    memory = [json.loads(p.stdout.readline()) for p in processes]
+    for p in processes:
+        p.wait()
+    return loads, memory
+
+def mean(values):
+    values = [v for v in values if v is not None]
+    return sum(values) / len(values) if values else float("nan")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=4, help="Processes loading at the same time")
+    parser.add_argument("--child", choices=LOADERS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(args.child)
+        return
+
+    print(f"{args.workers} processes per loader")
+    print(f"{'loader':<8} {'load s':>7} {'RSS MB':>7} {'PSS MB':>7} {'USS MB':>7}")
+    for loader in LOADERS:
+        loads, memory = run(loader, args.workers)
+        print(f"{loader:<8} {mean(loads):7.3f} "
+              f"{mean([m['rss'] for m in memory]) / 1024:7.1f} "
+              f"{mean([m['pss'] for m in memory]) / 1024:7.1f} "
+              f"{mean([m['uss'] for m in memory]) / 1024:7.1f}")
+
+if __name__ == "__main__":
+    main()
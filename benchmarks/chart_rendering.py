@@ -0,0 +1,101 @@
+# benchmarks/chart_rendering.py
+# Charts per second for the pie and bar charts: the former pyplot functions
+# (global figure per call, kept here as the reference) against the chart
+# engine, from 1 thread and from N threads. The pyplot path is only run from
+# one thread, since its global state is not safe to share.
+#
+# Run from the POPViz directory:
+#     python benchmarks/chart_rendering.py --charts 200 --threads 4
+import argparse
+import io
+import os
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "app"))
+
+from services.chart_engine import ChartEngine
+
+DATABASE_HEC_AVG = [0.35, 0.22, 0.43]
+
+def pyplot_pie(counts):
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    labels = [label for label, size in zip("HEC", counts) if size > 0]
+    colors = [color for color, size in zip(["gold", "skyblue", "lightgreen"], counts) if size > 0]
+    plt.figure(figsize=(5, 5))
+    plt.pie([size for size in counts if size > 0], labels=labels, autopct="%1.1f%%", colors=colors)
+    buffer = io.BytesIO()
+    plt.savefig(buffer, format="png", bbox_inches="tight")
+    plt.close()
+    return buffer.getvalue()
+
+def pyplot_bar(predicted, database):
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    plt.figure(figsize=(6, 4))
+    index = range(3)
+    plt.bar(index, predicted, 0.35, label="Predicted", color="gold")
+    plt.bar([i + 0.35 for i in index], database, 0.35, label="Database", color="skyblue")
+    plt.xlabel("Structure")
+    plt.ylabel("Proportion")
+    plt.xticks([i + 0.35 / 2 for i in index], ["Helix", "Sheet", "Coil"])
+    plt.legend()
+    plt.tight_layout()
+    buffer = io.BytesIO()
+    plt.savefig(buffer, format="png", bbox_inches="tight")
+    plt.close()
+    return buffer.getvalue()
+
+def workload(num_charts, seed=0):
+    # Alternating pie and bar charts with random H/E/C counts
+    rng = random.Random(seed)
+    jobs = []
+    for i in range(num_charts):
+        counts = [rng.randint(0, 300) for _ in range(3)]
+        total = sum(counts) or 1
+        jobs.append(("pie" if i % 2 == 0 else "bar", counts, [count / total for count in counts]))
+    return jobs
+
+def run(render_pie, render_bar, jobs, threads):
+    def render(job):
+        kind, counts, proportions = job
+        if kind == "pie":
+            return render_pie(counts)
+        return render_bar(proportions, DATABASE_HEC_AVG)
+
+    started = time.perf_counter()
+    if threads == 1:
+        for job in jobs:
+            render(job)
+    else:
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            list(executor.map(render, jobs))
+    return len(jobs) / (time.perf_counter() - started)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--charts", type=int, default=200)
+    parser.add_argument("--threads", type=int, default=4)
+    args = parser.parse_args()
+
+    jobs = workload(args.charts)
+    engine = ChartEngine()
+    # Imports and first-figure setup are not counted
+    pyplot_pie([1, 1, 1])
+    engine.pie_chart([1, 1, 1])
+    engine.bar_chart([0.3, 0.3, 0.4], DATABASE_HEC_AVG)
+
+    baseline = run(pyplot_pie, pyplot_bar, jobs, 1)
+    print(f"{'renderer':<16} {'threads':>7} {'charts/s':>9} {'speedup':>8}")
+    print(f"{'pyplot':<16} {1:>7} {baseline:9.1f} {1.0:8.2f}")
+    for threads in sorted({1, args.threads}):
+        rate = run(engine.pie_chart, engine.bar_chart, jobs, threads)
+        print(f"{'chart_engine':<16} {threads:>7} {rate:9.1f} {rate / baseline:8.2f}")
+
+if __name__ == "__main__":
+    main()
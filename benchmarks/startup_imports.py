@@ -0,0 +1,93 @@
+# benchmarks/startup_imports.py
+# Import-time audit of the app's startup path and of each page module, using
+# python -X importtime in a fresh interpreter per target.
+#
+# Run from the POPViz directory:
+#     python benchmarks/startup_imports.py --top 15
+#     python benchmarks/startup_imports.py --budget-ms 400   # exit 1 if startup gets slower
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app")
+
+# (label, module) imported by each measurement; "main" is what `python app/main.py`
+# imports before the first window, the rest happen on first navigation
+TARGETS = [
+    ("startup (main)", "main"),
+    ("landing page", "pages.landing_page"),
+    ("input page", "pages.input_page"),
+    ("history page", "pages.history_page"),
+    ("result page", "pages.result_page"),
+    ("prediction_algo", "services.prediction_algo"),
+    ("graph_service", "services.graph_service"),
+]
+
+def measure(module, baseline=()):
+    # Returns (wall seconds, [(cumulative us, self us, module name)], error), leaving
+    # out modules the bare interpreter already imports (site, sitecustomize, ...)
+    code = f"import sys; sys.path.insert(0, {APP_DIR!r})"
+    if module:
+        code += f"; import {module}"
+    started = time.perf_counter()
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                            capture_output=True, text=True)
+    wall = time.perf_counter() - started
+
+    rows = []
+    error = None
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = [part.strip() for part in line[len("import time:"):].split("|")]
+        if len(parts) != 3 or not parts[0].isdigit():
+            continue  # header line
+        if parts[2].strip() not in baseline:
+            rows.append((int(parts[1]), int(parts[0]), parts[2]))
+    if result.returncode != 0:
+        error = result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "failed"
+    return wall, rows, error
+
+def top_level(rows):
+    # Modules imported directly by the target (least indented), which add up to its total
+    if not rows:
+        return []
+    indent = min(len(name) - len(name.lstrip()) for _, _, name in rows)
+    return [row for row in rows if len(row[2]) - len(row[2].lstrip()) == indent]
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--top", type=int, default=10, help="Slowest imports listed per target")
+    parser.add_argument("--budget-ms", type=float, help="Fail if the startup imports take longer than this")
+    args = parser.parse_args()
+
+    _, interpreter_rows, _ = measure(None)
+    baseline = {name.strip() for _, _, name in interpreter_rows}
+
+    startup_ms = None
+    print(f"{'target':<18} {'wall ms':>8} {'import ms':>10}")
+    reports = []
+    for label, module in TARGETS:
+        wall, rows, error = measure(module, baseline)
+        total_ms = sum(cumulative for cumulative, _, _ in top_level(rows)) / 1000
+        if module == "main":
+            startup_ms = total_ms
+        status = f"  ({error})" if error else ""
+        print(f"{label:<18} {wall * 1000:8.0f} {total_ms:10.1f}{status}")
+        reports.append((label, rows))
+
+    for label, rows in reports:
+        print(f"\n{label}: slowest imports by cumulative time")
+        print(f"{'cumulative ms':>13} {'self ms':>8}  module")
+        for cumulative, self_us, name in sorted(rows, reverse=True)[:args.top]:
+            print(f"{cumulative / 1000:13.1f} {self_us / 1000:8.1f}  {name.strip()}")
+
+    if args.budget_ms is not None and startup_ms is not None and startup_ms > args.budget_ms:
+        print(f"\nStartup imports took {startup_ms:.1f} ms, over the {args.budget_ms:.0f} ms budget")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,56 @@
+# benchmarks/worker_pool_scaling.py
+# Throughput of PredictionPool from 1 to N worker processes on a synthetic proteome.
+#
+# Run from the POPViz directory:
+#     python benchmarks/worker_pool_scaling.py --proteins 2000 --max-workers 8
+import argparse
+import contextlib
+import io
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "app"))
+
+from services.worker_pool import PredictionPool
+
+AMINO_ACIDS = "ACDEFGHIKLMNPQRSTVWY"
+
+def synthetic_proteome(num_proteins, organism_name, seed=0):
+    # Log-normal lengths around 350 residues, roughly like a real proteome
+    rng = random.Random(seed)
+    jobs = []
+    for _ in range(num_proteins):
+        length = min(max(int(rng.lognormvariate(5.85, 0.6)), 30), 5000)
+        jobs.append((organism_name, "".join(rng.choice(AMINO_ACIDS) for _ in range(length))))
+    return jobs
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--proteins", type=int, default=2000)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--organism", default="Homo sapiens (Human)")
+    args = parser.parse_args()
+
+    jobs = synthetic_proteome(args.proteins, args.organism)
+    residues = sum(len(sequence) for _, sequence in jobs)
+    print(f"{len(jobs)} proteins, {residues} residues")
+    print(f"{'workers':>7} {'seconds':>8} {'proteins/s':>11} {'residues/s':>11} {'speedup':>8}")
+
+    # 1, 2, 4, ... up to max-workers, always including max-workers itself
+    counts = sorted({2 ** i for i in range(args.max_workers.bit_length()) if 2 ** i <= args.max_workers} | {args.max_workers})
+
+    baseline = None
+    for workers in counts:
+        # prediction_algo logs every call; keep it out of the table
+        with contextlib.redirect_stdout(io.StringIO()):
+            with PredictionPool(workers) as pool:
+                start = time.perf_counter()
+                pool.predict_many(jobs)
+                elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        print(f"{workers:>7} {elapsed:>8.2f} {len(jobs) / elapsed:>11.1f} {residues / elapsed:>11.0f} {baseline / elapsed:>7.2f}x")
+
+if __name__ == "__main__":
+    main()